@@ -1,17 +1,260 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+import asyncio
+import hmac
+import os
+import signal
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
 import numpy as np
-import joblib  # Utiliser joblib uniquement
 
-# Charger le modèle et le scaler
-model = joblib.load("modele_logistic_regression.pkl")
-scaler = joblib.load("scaler_minmax.pkl")
+import format_binaire
+import registre
+from audit import DOSSIER_AUDIT, JournalAudit
+from derive import PROFIL_NOM, PROFIL_PATH, Moniteur, charger_profil
+from cache_predictions import CachePredictions
+from encodage import FEATURES, encoder_et_valider
+import metriques
+from metriques import Etape, MiddlewareMetriques
+from micro_batch import MicroBatcher
+from shadow import Shadow
+
+# Modèle servi (registre.ModeleCharge : moteur préchauffé + version). Chargé au
+# démarrage puis remplacé d'un bloc par un rechargement : chaque requête lit
+# cette référence une seule fois et score entièrement avec la même version.
+modele = None
+
+# État exposé sur /ready ; "pret" ne passe à True qu'après le préchauffage
+etat = {"pret": False, "moteur": None, "version": None, "durees_ms": {}}
+
+# Rechargement à chaud en cours ou dernier résultat (voir /admin/modele)
+rechargement = {"en_cours": False, "version": None, "erreur": None}
+
+# Taille maximale d'un lot pour /predict/batch (configurable par variable d'environnement)
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+# Taille maximale du corps d'une requête par lot, vérifiée avant toute validation
+# (défaut : 1 Ko par ligne, large pour une ligne JSON de 11 variables)
+MAX_BATCH_OCTETS = int(os.getenv("MAX_BATCH_OCTETS", str(MAX_BATCH_SIZE * 1024)))
+
+# Moteur de scoring : "compile" (produit scalaire + sigmoïde) ou "sklearn" (chaîne d'origine)
+MOTEUR_SCORING = os.getenv("MOTEUR_SCORING", "compile")
+
+# Format des artefacts : "compact" (modele_compact.npy en memory-map, sans pickle)
+# ou "pickle" (fichiers joblib d'origine). Le format compact n'est utilisé qu'avec
+# le moteur compilé et s'il a été exporté (python Api/artefacts.py).
+ARTEFACTS_FORMAT = os.getenv("ARTEFACTS_FORMAT", "compact")
+
+# Jeton exigé (en-tête X-Admin-Token) par les routes /admin ; vide = routes /admin désactivées
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Cache des prédictions (CACHE_TAILLE=0 pour le désactiver), invalidé quand
+# la version du modèle change
+cache = CachePredictions(
+    taille_max=int(os.getenv("CACHE_TAILLE", "10000")),
+    ttl=float(os.getenv("CACHE_TTL", "3600")),
+)
+
+# Micro-batching optionnel de /predict : les requêtes concurrentes reçues dans
+# la fenêtre sont scorées ensemble (MICRO_BATCH=1 pour l'activer)
+MICRO_BATCH = os.getenv("MICRO_BATCH", "0") == "1"
+MICRO_BATCH_FENETRE_MS = float(os.getenv("MICRO_BATCH_FENETRE_MS", "2"))
+MICRO_BATCH_TAILLE = int(os.getenv("MICRO_BATCH_TAILLE", "256"))
+micro_batcher = None
+
+# Scoring fantôme : SHADOW_VERSION désigne un challenger du registre, scoré en
+# arrière-plan sur une fraction SHADOW_TAUX des lignes. La file (SHADOW_FILE
+# appels en attente au plus) abandonne les lignes quand elle est saturée.
+# Agrégats sauvegardés par process dans SHADOW_STATS-<pid> (shadow_stats-<pid>.json).
+SHADOW_VERSION = os.getenv("SHADOW_VERSION", "")
+SHADOW_TAUX = float(os.getenv("SHADOW_TAUX", "1.0"))
+SHADOW_FILE = int(os.getenv("SHADOW_FILE", "1000"))
+SHADOW_STATS = os.getenv("SHADOW_STATS", os.path.join(registre.DOSSIER, "shadow_stats.json"))
+shadow = None
+
+# Journal d'audit des décisions (AUDIT=0 pour le désactiver) : tampon circulaire
+# de AUDIT_CAPACITE lignes vidé en arrière-plan dans des segments JSONL gzip.
+# AUDIT_POLITIQUE quand le tampon est plein : ecraser | rejeter | bloquer ;
+# avec "bloquer", les handlers async déposent via le threadpool (auditer_async) :
+# l'attente ne gèle jamais la boucle d'événements, seulement la requête concernée.
+# AUDIT_FSYNC_S : 0 = fsync à chaque lot, > 0 = intervalle, < 0 = jamais.
+AUDIT = os.getenv("AUDIT", "1") == "1"
+journal = None
+
+
+# Suivi de dérive (DERIVE=0 pour le désactiver) : histogrammes à bornes fixes
+# comparés au profil de référence de la version servie (profil_reference.json
+# du dossier de la version, à défaut celui d'Api/)
+DERIVE = os.getenv("DERIVE", "1") == "1"
+moniteur = None
+
+
+def creer_journal():
+    return JournalAudit(
+        dossier=os.getenv("AUDIT_DOSSIER", DOSSIER_AUDIT),
+        capacite=int(os.getenv("AUDIT_CAPACITE", "100000")),
+        politique=os.getenv("AUDIT_POLITIQUE", "ecraser"),
+        fsync_s=float(os.getenv("AUDIT_FSYNC_S", "1")),
+        taille_segment=int(float(os.getenv("AUDIT_SEGMENT_MO", "64")) * 1024 * 1024),
+        duree_segment=float(os.getenv("AUDIT_SEGMENT_S", "3600")),
+    )
+
+
+def charger(version=None):
+    """Charge et préchauffe une version du registre.
+
+    Sans version : celle désignée par registre/ACTIF, ou à défaut les artefacts
+    d'Api/ (version = empreinte des fichiers).
+    """
+    version = version or registre.version_active()
+    if version is None:
+        return registre.charger_modele(moteur_nom=MOTEUR_SCORING, format_artefacts=ARTEFACTS_FORMAT)
+    return registre.charger_modele(registre.dossier_version(version), version,
+                                   MOTEUR_SCORING, ARTEFACTS_FORMAT)
+
+
+def creer_moniteur(version):
+    """Moniteur de dérive sur le profil de la version, None si aucun profil."""
+    chemins = [PROFIL_PATH]
+    if version and os.path.isdir(registre.dossier_version(version)):
+        chemins.insert(0, os.path.join(registre.dossier_version(version), PROFIL_NOM))
+    for chemin in chemins:
+        if os.path.exists(chemin):
+            return Moniteur(charger_profil(chemin))
+    return None
+
+
+def activer_modele(nouveau):
+    """Met en service un modèle déjà chargé (simple remplacement de référence)."""
+    global modele, moniteur
+    if DERIVE:
+        # Les probabilités de référence dépendent du modèle : nouveau moniteur
+        moniteur = creer_moniteur(nouveau.version)
+    modele = nouveau
+    etat.update(pret=True, moteur=nouveau.moteur.nom, version=nouveau.version,
+                durees_ms=nouveau.durees_ms)
+    print(f"✅ Modèle {nouveau.version} en service (moteur {nouveau.moteur.nom}) : {nouveau.durees_ms}")
+
+
+async def recharger(version=None, persister=False):
+    """Charge la version hors de la boucle d'événements puis la met en service.
+
+    Les requêtes en cours finissent avec l'ancien modèle ; en cas d'échec,
+    l'ancien modèle reste en service.
+    """
+    rechargement.update(en_cours=True, version=version, erreur=None)
+    try:
+        nouveau = await asyncio.to_thread(charger, version)
+        if persister:
+            registre.activer(nouveau.version)
+        activer_modele(nouveau)
+    except Exception as e:
+        rechargement["erreur"] = f"{type(e).__name__}: {e}"
+        print(f"⚠️ Rechargement abandonné, {etat['version']} reste en service : {rechargement['erreur']}")
+    finally:
+        rechargement["en_cours"] = False
+
+
+_taches = set()
+
+
+def lancer_rechargement(version=None, persister=False):
+    if rechargement["en_cours"]:
+        raise HTTPException(status_code=409, detail="Rechargement déjà en cours")
+    tache = asyncio.get_running_loop().create_task(recharger(version, persister))
+    _taches.add(tache)
+    tache.add_done_callback(_taches.discard)
+
+
+def _sur_sighup():
+    if not rechargement["en_cours"]:
+        lancer_rechargement()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global micro_batcher, journal
+    activer_modele(charger())
+
+    # kill -HUP <pid> : relit registre/ACTIF et recharge à chaud
+    boucle = asyncio.get_running_loop()
+    try:
+        boucle.add_signal_handler(signal.SIGHUP, _sur_sighup)
+    except (NotImplementedError, RuntimeError, ValueError, AttributeError):
+        pass
+
+    if SHADOW_VERSION:
+        demarrer_shadow(charger(SHADOW_VERSION))
+
+    if AUDIT:
+        journal = creer_journal()
+        journal.demarrer()
+
+    if MICRO_BATCH:
+        micro_batcher = MicroBatcher(scorer_micro_batch, MICRO_BATCH_FENETRE_MS, MICRO_BATCH_TAILLE)
+        await micro_batcher.demarrer()
+    yield
+    etat["pret"] = False
+    try:
+        boucle.remove_signal_handler(signal.SIGHUP)
+    except (NotImplementedError, RuntimeError, ValueError, AttributeError):
+        pass
+    if micro_batcher is not None:
+        await micro_batcher.arreter()
+        micro_batcher = None
+    arreter_shadow()
+    if journal is not None:
+        courant, journal = journal, None
+        courant.arreter()
+
+
+def demarrer_shadow(challenger):
+    """Démarre le scoring fantôme, ou change de challenger s'il tourne déjà."""
+    global shadow
+    if shadow is not None:
+        shadow.challenger = challenger
+    else:
+        shadow = Shadow(challenger, SHADOW_TAUX, SHADOW_FILE, stats_path=SHADOW_STATS)
+        shadow.demarrer()
+    print(f"👥 Scoring fantôme avec le challenger {challenger.version} (taux {SHADOW_TAUX})")
+
+
+def arreter_shadow():
+    global shadow
+    if shadow is not None:
+        courant, shadow = shadow, None
+        courant.arreter()
 
 # Créer une instance de l'application FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MiddlewareMetriques)
+
+
+def _json_fini(valeur):
+    """Remplace NaN / ±inf par leur texte : sinon la réponse 422 n'est pas sérialisable."""
+    if isinstance(valeur, float) and not np.isfinite(valeur):
+        return str(valeur)
+    if isinstance(valeur, dict):
+        return {k: _json_fini(v) for k, v in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        return [_json_fini(v) for v in valeur]
+    return valeur
+
+
+@app.exception_handler(RequestValidationError)
+async def erreur_validation(request, exc):
+    return JSONResponse(status_code=422, content={"detail": _json_fini(jsonable_encoder(exc.errors()))})
 
 # Définir les données d'entrée attendues avec 11 colonnes
 class ClientData(BaseModel):
+    # NaN / Infinity refusés dès la validation (422) : la chaîne sklearn les
+    # rejette, le moteur compilé les scorerait
+    model_config = ConfigDict(allow_inf_nan=False)
+
     Gender: int
     Married: int
     Dependents: int
@@ -24,38 +267,477 @@ class ClientData(BaseModel):
     Credit_History: float
     Property_Area: int
 
+def vers_matrice(clients):
+    """Construit la matrice (n, 11) dans l'ordre de FEATURES."""
+    return np.array(
+        [[getattr(client, feature) for feature in FEATURES] for client in clients],
+        dtype=float,
+    ).reshape(-1, len(FEATURES))
+
+
+def modele_courant():
+    """Référence au modèle servi, à lire une seule fois par requête."""
+    courant = modele
+    if courant is None:
+        raise HTTPException(status_code=503, detail="Modèle en cours de chargement")
+    return courant
+
+
+def scorer(input_data, courant):
+    """Normalise et score une matrice (n, 11) en un seul passage."""
+    with Etape("scoring"):
+        predictions, probabilities = courant.moteur.scorer(input_data)
+    metriques.tailles_lot.observer(len(input_data))
+    metriques.probabilites.observer_lot(probabilities)
+    observer_derive(input_data, probabilities)
+    # Dépôt non bloquant dans la file du challenger, scoré par le thread de fond
+    fantome = shadow
+    if fantome is not None:
+        with Etape("shadow"):
+            fantome.soumettre(input_data, predictions, probabilities, courant.version)
+    return predictions, probabilities
+
+
+def observer_derive(input_data, probabilities=None):
+    courant = moniteur
+    if courant is not None:
+        with Etape("derive"):
+            courant.observer(input_data, probabilities)
+
+
+def scorer_micro_batch(input_data):
+    courant = modele_courant()
+    predictions, probabilities = scorer(input_data, courant)
+    return predictions, probabilities, [courant.version] * len(input_data)
+
+
+def auditer(endpoint, version, input_data, predictions, probabilities):
+    """Dépôt dans le journal d'audit (écriture faite par le thread du journal)."""
+    courant = journal
+    if courant is not None:
+        with Etape("audit"):
+            courant.enregistrer(endpoint, version, input_data, predictions, probabilities)
+
+
+async def auditer_async(endpoint, version, input_data, predictions, probabilities):
+    """auditer depuis un handler async : hors de la boucle si le dépôt peut attendre."""
+    courant = journal
+    if courant is not None and courant.politique == "bloquer":
+        await run_in_threadpool(auditer, endpoint, version, input_data, predictions, probabilities)
+    else:
+        auditer(endpoint, version, input_data, predictions, probabilities)
+
+
+def formater(prediction, probability, version):
+    statut = "Accepté" if prediction == 1 else "Refusé"
+    return {
+        "Statut Crédit": statut,
+        "Probabilité de défaut": round(float(probability), 2),
+        "Version modèle": version,
+    }
+
+
+def expliquer(input_data, courant):
+    """Score + contributions par variable (moteur.expliquer), même passe vectorisée."""
+    with Etape("scoring"):
+        predictions, probabilities, contributions = courant.moteur.expliquer(input_data)
+    metriques.tailles_lot.observer(len(input_data))
+    metriques.probabilites.observer_lot(probabilities)
+    observer_derive(input_data, probabilities)
+    return predictions, probabilities, contributions
+
+
+def formater_explications(predictions, probabilities, contributions, courant, top):
+    """Résultats de formater + contributions au log-odds et principaux facteurs."""
+    # Tri des |contributions| pour tout le lot d'un coup
+    ordres = np.argsort(-np.abs(contributions), axis=1)[:, :top].tolist()
+    arrondies = (np.round(contributions, 4) + 0.0).tolist()
+    base = round(courant.moteur.base, 4)
+    resultats = []
+    for prediction, probability, ligne, ordre in zip(predictions, probabilities, arrondies, ordres):
+        resultat = formater(prediction, probability, courant.version)
+        resultat["Base"] = base
+        resultat["Contributions"] = dict(zip(FEATURES, ligne))
+        # Une contribution nulle (variable au minimum du scaler) n'est pas un facteur
+        resultat["Principaux facteurs"] = [
+            {"variable": FEATURES[j], "contribution": ligne[j], "effet": "hausse" if ligne[j] > 0 else "baisse"}
+            for j in ordre if ligne[j] != 0
+        ]
+        resultats.append(resultat)
+    return resultats
+
 # Route principale
 @app.get("/")
 def read_root():
     return {"message": "API de scoring de crédit opérationnelle 🎯"}
 
+# Disponibilité : 503 tant que le préchauffage n'est pas terminé
+@app.get("/ready")
+def ready():
+    if not etat["pret"]:
+        raise HTTPException(status_code=503, detail="Démarrage en cours")
+    return etat
+
 # Endpoint de prédiction
 @app.post("/predict")
-def predict(data: ClientData):
-    input_data = np.array([[
-        data.Gender,
-        data.Married,
-        data.Dependents,
-        data.Education,
-        data.Self_Employed,
-        data.ApplicantIncome,
-        data.CoapplicantIncome,
-        data.LoanAmount,
-        data.Loan_Amount_Term,
-        data.Credit_History,
-        data.Property_Area
-    ]])
-
-    # Appliquer la normalisation
-    input_scaled = scaler.transform(input_data)
-
-    # Prédiction
-    prediction = model.predict(input_scaled)[0]
-    probability = model.predict_proba(input_scaled)[0][1]
+async def predict(data: ClientData):
+    metriques.debut_handler()
+    with Etape("matrice"):
+        input_data = vers_matrice([data])
 
-    statut = "Accepté" if prediction == 1 else "Refusé"
+    courant = modele_courant()
+    cle = cache.cle(input_data[0])
+    # Entrée du cache : (réponse, prédiction, probabilité exacte) ; audit et
+    # dérive reçoivent la même probabilité non arrondie qu'en l'absence de cache
+    entree = cache.get(cle, courant.version)
+    if entree is not None:
+        resultat, prediction, probability = entree
+        # Pas d'appel au moteur (scoring_taille_lot inchangé), mais la probabilité
+        # renvoyée compte dans la distribution exposée sur /metrics
+        metriques.probabilites.observer(probability)
+        await auditer_async("/predict", resultat["Version modèle"], input_data, [prediction], [probability])
+        observer_derive(input_data, [probability])
+        metriques.fin_handler()
+        return resultat
+
+    if micro_batcher is not None:
+        # La version est celle du modèle qui a réellement scoré le lot
+        with Etape("micro_batch"):
+            prediction, probability, version = await micro_batcher.soumettre(input_data[0])
+    elif courant.moteur.nom == "sklearn":
+        # Chaîne sklearn (choisie ou repli) : plusieurs centaines de microsecondes,
+        # hors de la boucle d'événements
+        predictions, probabilities = await run_in_threadpool(scorer, input_data, courant)
+        prediction, probability, version = predictions[0], probabilities[0], courant.version
+    else:
+        # Normalisation + prédiction (quelques microsecondes avec le moteur compilé,
+        # inutile de passer par le threadpool)
+        predictions, probabilities = scorer(input_data, courant)
+        prediction, probability, version = predictions[0], probabilities[0], courant.version
+
+    resultat = formater(prediction, probability, version)
+    cache.set(cle, (resultat, prediction, probability), version)
+    await auditer_async("/predict", version, input_data, [prediction], [probability])
+    metriques.fin_handler()
+    return resultat
+
+# Endpoint de prédiction par lot : une seule passe scaler + modèle pour tout le lot.
+# Deux formats de corps : JSON (liste de ClientData) ou matrice binaire
+# (Content-Type: application/x-scoring-matrix, voir format_binaire.py).
+_lot_clients = TypeAdapter(List[ClientData])
+_lot_brut = TypeAdapter(List[Dict[str, Any]])
+
+
+def verifier_taille_lot(n):
+    if n > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot trop volumineux : {n} lignes (maximum {MAX_BATCH_SIZE})"
+        )
+
+
+def _corps_trop_volumineux():
+    return HTTPException(status_code=413, detail=f"Corps trop volumineux (maximum {MAX_BATCH_OCTETS} octets)")
+
+
+async def lire_corps(request):
+    """Corps d'une requête par lot, refusé (413) dès qu'il dépasse MAX_BATCH_OCTETS :
+    un lot trop gros n'est ni lu en entier ni validé."""
+    longueur = request.headers.get("content-length", "")
+    if longueur.isdigit() and int(longueur) > MAX_BATCH_OCTETS:
+        raise _corps_trop_volumineux()
+    morceaux, taille = [], 0
+    async for morceau in request.stream():
+        taille += len(morceau)
+        if taille > MAX_BATCH_OCTETS:
+            raise _corps_trop_volumineux()
+        morceaux.append(morceau)
+    return b"".join(morceaux)
+
+
+async def valider_lot(corps, adaptateur):
+    """Validation JSON du lot hors de la boucle d'événements, puis contrôle du nombre de lignes."""
+    with Etape("validation_json"):
+        try:
+            lot = await run_in_threadpool(adaptateur.validate_json, corps)
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+            )
+    verifier_taille_lot(len(lot))
+    return lot
+
+
+def scorer_lot_json(clients):
+    verifier_taille_lot(len(clients))
+    if not clients:
+        return []
+
+    courant = modele_courant()
+    with Etape("matrice"):
+        input_data = vers_matrice(clients)
+    predictions, probabilities = scorer(input_data, courant)
+    auditer("/predict/batch", courant.version, input_data, predictions, probabilities)
+
+    # Résultats dans l'ordre des lignes reçues
+    with Etape("formatage"):
+        return [formater(p, proba, courant.version) for p, proba in zip(predictions, probabilities)]
+
+
+async def scorer_lot_binaire(corps):
+    # Vue sans copie sur le corps reçu : ni JSON ni pydantic
+    with Etape("decodage"):
+        try:
+            input_data = format_binaire.depaqueter(corps, len(FEATURES))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    verifier_taille_lot(len(input_data))
+    if not np.isfinite(input_data).all():
+        raise HTTPException(status_code=400, detail="Valeurs NaN ou infinies dans la matrice")
+
+    courant = modele_courant()
+    predictions, probabilities = scorer(input_data, courant) if len(input_data) else (None, np.empty(0))
+    if len(input_data):
+        await auditer_async("/predict/batch", courant.version, input_data, predictions, probabilities)
+    return Response(
+        content=format_binaire.empaqueter_probabilites(probabilities, input_data.dtype),
+        media_type=format_binaire.CONTENT_TYPE,
+        headers={"X-Lignes": str(len(input_data)), "X-Version-Modele": courant.version},
+    )
+
+
+@app.post("/predict/batch", openapi_extra={"requestBody": {"required": True, "content": {
+    "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/ClientData"}}},
+    format_binaire.CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+}}})
+async def predict_batch(request: Request):
+    metriques.debut_handler()
+    corps = await lire_corps(request)
+
+    if request.headers.get("content-type", "").startswith(format_binaire.CONTENT_TYPE):
+        reponse = await scorer_lot_binaire(corps)
+    else:
+        clients = await valider_lot(corps, _lot_clients)
+        # Construction de la matrice et formatage hors de la boucle d'événements
+        reponse = await run_in_threadpool(scorer_lot_json, clients)
+
+    metriques.fin_handler()
+    return reponse
+
+# Explication de la décision : contribution exacte de chaque variable au log-odds
+# (coef_ * valeur normalisée ; Base + somme des contributions = log-odds de la
+# probabilité renvoyée). "effet" : hausse ou baisse de cette probabilité ; les
+# contributions nulles ne figurent pas dans "Principaux facteurs".
+@app.post("/explain")
+async def explain(data: ClientData, top: int = Query(3, ge=1, le=len(FEATURES))):
+    metriques.debut_handler()
+    courant = modele_courant()
+    with Etape("matrice"):
+        input_data = vers_matrice([data])
+    predictions, probabilities, contributions = expliquer(input_data, courant)
+    await auditer_async("/explain", courant.version, input_data, predictions, probabilities)
+    resultat = formater_explications(predictions, probabilities, contributions, courant, top)[0]
+    metriques.fin_handler()
+    return resultat
+
+
+def expliquer_lot(clients, top):
+    if not clients:
+        return []
+    courant = modele_courant()
+    with Etape("matrice"):
+        input_data = vers_matrice(clients)
+    predictions, probabilities, contributions = expliquer(input_data, courant)
+    auditer("/explain/batch", courant.version, input_data, predictions, probabilities)
+    with Etape("formatage"):
+        return formater_explications(predictions, probabilities, contributions, courant, top)
+
+
+@app.post("/explain/batch", openapi_extra={"requestBody": {"required": True, "content": {
+    "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/ClientData"}}},
+}}})
+async def explain_batch(request: Request, top: int = Query(3, ge=1, le=len(FEATURES))):
+    metriques.debut_handler()
+    clients = await valider_lot(await lire_corps(request), _lot_clients)
+    resultats = await run_in_threadpool(expliquer_lot, clients, top)
+    metriques.fin_handler()
+    return resultats
+
+# Endpoint de prédiction sur données brutes (libellés Kaggle ou français, valeurs
+# manquantes) : encodage, imputation et validation faits côté serveur, en bloc
+def scorer_brut(clients, imputer):
+    with Etape("encodage"):
+        input_data, valides, erreurs = encoder_et_valider(clients, imputer=imputer)
 
+    # Les lignes rejetées comptent aussi pour la dérive (valeurs manquantes ou
+    # hors domaine) ; les lignes valides sont observées par scorer
+    if not valides.all():
+        observer_derive(input_data[~valides])
+
+    # Une entrée par ligne reçue, None pour les lignes rejetées (voir "erreurs")
+    resultats = [None] * len(clients)
+    if valides.any():
+        courant = modele_courant()
+        predictions, probabilities = scorer(input_data[valides], courant)
+        auditer("/predict/raw", courant.version, input_data[valides], predictions, probabilities)
+        for i, p, proba in zip(np.flatnonzero(valides).tolist(), predictions, probabilities):
+            resultats[i] = formater(p, proba, courant.version)
+    return {"resultats": resultats, "erreurs": erreurs}
+
+
+@app.post("/predict/raw", openapi_extra={"requestBody": {"required": True, "content": {
+    "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+}}})
+async def predict_raw(request: Request, imputer: bool = True):
+    metriques.debut_handler()
+    clients = await valider_lot(await lire_corps(request), _lot_brut)
+    reponse = await run_in_threadpool(scorer_brut, clients, imputer)
+    metriques.fin_handler()
+    return reponse
+
+# Administration du modèle servi (rechargement à chaud, sans redémarrage)
+def verifier_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Administration désactivée (ADMIN_TOKEN non défini)")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+
+def verifier_version(version):
+    # Seules les versions enregistrées sont acceptées : pas de chemin arbitraire ("..")
+    if not registre.version_connue(version):
+        raise HTTPException(status_code=404, detail=f"Version inconnue : {version}")
+
+
+@app.get("/admin/modele", dependencies=[Depends(verifier_admin)])
+def admin_modele():
     return {
-        "Statut Crédit": statut,
-        "Probabilité de défaut": round(float(probability), 2)
+        "actif": etat["version"],
+        "registre": registre.version_active(),
+        "versions": registre.lister_versions(),
+        "rechargement": rechargement,
     }
+
+
+# Active une version du registre : chargement et préchauffage en arrière-plan,
+# puis bascule atomique et mise à jour de registre/ACTIF
+@app.post("/admin/modele/{version}", status_code=202, dependencies=[Depends(verifier_admin)])
+async def admin_activer(version: str):
+    verifier_version(version)
+    lancer_rechargement(version, persister=True)
+    return {"version": version, "statut": "chargement en cours"}
+
+
+# Relit registre/ACTIF (équivalent de kill -HUP)
+@app.post("/admin/recharger", status_code=202, dependencies=[Depends(verifier_admin)])
+async def admin_recharger():
+    lancer_rechargement()
+    return {"version": registre.version_active(), "statut": "chargement en cours"}
+
+# Scoring fantôme : taux de désaccord et écarts de probabilité champion / challenger
+@app.get("/shadow/stats")
+def shadow_stats():
+    fantome = shadow
+    if fantome is None:
+        raise HTTPException(status_code=404, detail="Scoring fantôme inactif")
+    return fantome.stats()
+
+
+@app.post("/admin/shadow/{version}", dependencies=[Depends(verifier_admin)])
+async def admin_shadow(version: str):
+    verifier_version(version)
+    demarrer_shadow(await asyncio.to_thread(charger, version))
+    return shadow.stats()
+
+
+@app.delete("/admin/shadow", dependencies=[Depends(verifier_admin)])
+def admin_shadow_arreter():
+    arreter_shadow()
+    return {"statut": "arrêté"}
+
+# Dérive des entrées et des scores par rapport au profil de référence
+# (PSI / KS par variable ; niveau : stable < 0.1 <= moderee < 0.25 <= forte)
+@app.get("/drift")
+def drift(details: bool = False):
+    courant = moniteur
+    if courant is None:
+        raise HTTPException(status_code=404, detail="Suivi de dérive inactif (aucun profil de référence)")
+    return courant.rapport(details)
+
+
+@app.post("/admin/drift/reset", dependencies=[Depends(verifier_admin)])
+def drift_reset():
+    courant = moniteur
+    if courant is None:
+        raise HTTPException(status_code=404, detail="Suivi de dérive inactif (aucun profil de référence)")
+    courant.reinitialiser()
+    return {"statut": "réinitialisé"}
+
+# Statistiques du cache de prédictions
+@app.get("/cache/stats")
+def cache_stats():
+    return cache.stats()
+
+# Métriques au format texte Prometheus
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(metriques.registre.exposer(), media_type="text/plain; version=0.0.4")
+
+
+def _metriques_cache():
+    stats = cache.stats()
+    for nom in ("hits", "misses", "evictions"):
+        yield f"# TYPE scoring_cache_{nom}_total counter"
+        yield f"scoring_cache_{nom}_total {stats[nom]}"
+    yield "# TYPE scoring_cache_taille gauge"
+    yield f"scoring_cache_taille {stats['taille']}"
+
+
+def _metriques_shadow():
+    fantome = shadow
+    if fantome is None:
+        return
+    # Compteurs Prometheus : ce process seulement (les workers sont additionnés au scrape)
+    stats = fantome.stats(cumuler=False)
+    for nom in ("soumises", "rejetees"):
+        yield f"# TYPE scoring_shadow_lignes_{nom}_total counter"
+        yield f"scoring_shadow_lignes_{nom}_total {stats[nom]}"
+    yield "# TYPE scoring_shadow_desaccords_total counter"
+    for paire in stats["paires"]:
+        yield (f'scoring_shadow_desaccords_total{{champion="{paire["champion"]}",'
+               f'challenger="{paire["challenger"]}"}} {paire["desaccords"]}')
+
+
+def _metriques_audit():
+    courant = journal
+    if courant is None:
+        return
+    stats = courant.stats()
+    for nom in ("recues", "ecrites", "pertes"):
+        yield f"# TYPE scoring_audit_lignes_{nom}_total counter"
+        yield f"scoring_audit_lignes_{nom}_total {stats[nom]}"
+    yield "# TYPE scoring_audit_en_attente gauge"
+    yield f"scoring_audit_en_attente {stats['en_attente']}"
+
+
+def _metriques_derive():
+    courant = moniteur
+    if courant is None:
+        return
+    rapport = courant.rapport()
+    yield "# TYPE scoring_derive_psi gauge"
+    for feature, resultat in rapport["variables"].items():
+        if resultat["psi"] is not None:
+            yield f'scoring_derive_psi{{variable="{feature}"}} {resultat["psi"]}'
+    if "probabilite" in rapport:
+        yield f'scoring_derive_psi{{variable="probabilite"}} {rapport["probabilite"]["psi"]}'
+    for nom in ("manquantes", "hors_domaine"):
+        yield f"# TYPE scoring_derive_{nom}_total counter"
+        for feature, resultat in rapport["variables"].items():
+            yield f'scoring_derive_{nom}_total{{variable="{feature}"}} {resultat[nom]}'
+
+
+metriques.registre.collecteurs.append(_metriques_cache)
+metriques.registre.collecteurs.append(_metriques_shadow)
+metriques.registre.collecteurs.append(_metriques_audit)
+metriques.registre.collecteurs.append(_metriques_derive)
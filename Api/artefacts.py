@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+# Les artefacts sont résolus par rapport à ce fichier, quel que soit le
+# répertoire de lancement du process
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(DOSSIER, "modele_logistic_regression.pkl")
+SCALER_PATH = os.path.join(DOSSIER, "scaler_minmax.pkl")
+SOMMES_PATH = os.path.join(DOSSIER, "artefacts.sha256")
+COMPACT_PATH = os.path.join(DOSSIER, "modele_compact.npy")
+N_FEATURES = 11
+
+# Format compact : un seul enregistrement numpy structuré (.npy), lisible par
+# memory-map sans pickle. Incrémenter FORMAT_COMPACT à chaque changement de DTYPE_COMPACT.
+# "source" : empreinte des pickles exportés, pour refuser un format compact périmé.
+FORMAT_COMPACT = 2
+DTYPE_COMPACT = np.dtype([
+    ("format", "<u4"),
+    ("source", "S16"),
+    ("min", "<f8", (N_FEATURES,)),
+    ("scale", "<f8", (N_FEATURES,)),
+    ("data_min", "<f8", (N_FEATURES,)),
+    ("data_max", "<f8", (N_FEATURES,)),
+    ("coef", "<f8", (N_FEATURES,)),
+    ("intercept", "<f8"),
+    ("classes", "<i8", (2,)),
+])
+
+
+def sha256_fichier(chemin):
+    h = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def empreinte_artefacts(*chemins):
+    """Empreinte courte commune à plusieurs artefacts (modèle, scaler...)."""
+    h = hashlib.sha256()
+    for chemin in chemins:
+        h.update(sha256_fichier(chemin).encode())
+    return h.hexdigest()[:16]
+
+
+def lire_sommes(chemin=SOMMES_PATH):
+    """Lit un fichier au format `sha256sum` : "<hash>  <nom de fichier>"."""
+    sommes = {}
+    with open(chemin) as f:
+        for ligne in f:
+            if ligne.strip():
+                somme, nom = ligne.split(maxsplit=1)
+                sommes[nom.strip().lstrip("*")] = somme
+    return sommes
+
+
+def verifier_sommes(chemins, sommes_path=SOMMES_PATH):
+    """Compare chaque artefact à la somme attendue ; lève ValueError en cas d'écart."""
+    if not os.path.exists(sommes_path):
+        print(f"⚠️ {os.path.basename(sommes_path)} absent, sommes de contrôle non vérifiées")
+        return
+    sommes = lire_sommes(sommes_path)
+    for chemin in chemins:
+        attendue = sommes.get(os.path.basename(chemin))
+        if attendue is None:
+            raise ValueError(f"Aucune somme de contrôle pour {os.path.basename(chemin)}")
+        if sha256_fichier(chemin) != attendue:
+            raise ValueError(f"Somme de contrôle invalide pour {os.path.basename(chemin)}")
+
+
+def charger_artefacts(model_path=MODEL_PATH, scaler_path=SCALER_PATH, sommes_path=SOMMES_PATH):
+    """Vérifie puis charge le modèle et le scaler."""
+    # Import différé : joblib (et sklearn via le unpickling) ne sont chargés qu'ici
+    import joblib
+
+    verifier_sommes([model_path, scaler_path], sommes_path)
+    model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    for nom, objet in (("modèle", model), ("scaler", scaler)):
+        if getattr(objet, "n_features_in_", None) != N_FEATURES:
+            raise ValueError(
+                f"Le {nom} attend {getattr(objet, 'n_features_in_', '?')} variables au lieu de {N_FEATURES}"
+            )
+    return model, scaler
+
+
+def exporter_compact(model, scaler, chemin=COMPACT_PATH, pickles=(MODEL_PATH, SCALER_PATH)):
+    """Écrit les seuls paramètres utiles à l'inférence dans le format compact.
+
+    `pickles` : fichiers (modèle, scaler) dont model et scaler sont issus ; leur
+    empreinte est enregistrée avec les paramètres.
+    """
+    compact = np.zeros((), dtype=DTYPE_COMPACT)
+    compact["format"] = FORMAT_COMPACT
+    compact["source"] = empreinte_artefacts(*pickles).encode()
+    compact["min"] = scaler.min_
+    compact["scale"] = scaler.scale_
+    compact["data_min"] = scaler.data_min_
+    compact["data_max"] = scaler.data_max_
+    compact["coef"] = np.ravel(model.coef_)
+    compact["intercept"] = np.ravel(model.intercept_)[0]
+    compact["classes"] = model.classes_
+    np.save(chemin, compact, allow_pickle=False)
+    return compact
+
+
+def charger_compact(chemin=COMPACT_PATH, sommes_path=SOMMES_PATH, pickles=(MODEL_PATH, SCALER_PATH)):
+    """Ouvre le format compact en memory-map (lecture seule, sans pickle).
+
+    Si les pickles sont présents à côté, le format compact doit en être issu :
+    un modèle ou un scaler remplacé sans réexport lève ValueError.
+    """
+    verifier_sommes([chemin], sommes_path)
+    compact = np.load(chemin, mmap_mode="r", allow_pickle=False)
+    if compact.dtype != DTYPE_COMPACT or int(compact["format"]) != FORMAT_COMPACT:
+        raise ValueError(f"Format compact non reconnu dans {os.path.basename(chemin)} "
+                         f"(réexporter : python Api/artefacts.py {chemin})")
+    if all(os.path.exists(p) for p in pickles) and compact["source"].item().decode() != empreinte_artefacts(*pickles):
+        raise ValueError(f"{os.path.basename(chemin)} n'est plus issu de "
+                         f"{' + '.join(os.path.basename(p) for p in pickles)} "
+                         f"(réexporter : python Api/artefacts.py {chemin})")
+    return compact
+
+
+def ecrire_sommes(chemins, sommes_path=SOMMES_PATH):
+    with open(sommes_path, "w") as f:
+        for chemin in chemins:
+            f.write(f"{sha256_fichier(chemin)}  {os.path.basename(chemin)}\n")
+
+
+if __name__ == "__main__":
+    # Export : python Api/artefacts.py [modele_compact.npy]
+    # Les pickles et les sommes sont ceux du dossier du fichier exporté
+    # (Api/ par défaut, ou une version du registre).
+    from moteurs import MoteurCompile, MoteurSklearn, echantillon_parite, verifier_parite
+
+    chemin = os.path.abspath(sys.argv[1]) if len(sys.argv) > 1 else COMPACT_PATH
+    dossier = os.path.dirname(chemin)
+    pickles = tuple(os.path.join(dossier, os.path.basename(p)) for p in (MODEL_PATH, SCALER_PATH))
+    sommes_path = os.path.join(dossier, os.path.basename(SOMMES_PATH))
+    model, scaler = charger_artefacts(*pickles, sommes_path)
+    exporter_compact(model, scaler, chemin, pickles)
+    ecrit = MoteurCompile.depuis_compact(np.load(chemin, allow_pickle=False))
+    ecart = verifier_parite(ecrit, MoteurSklearn(model, scaler), echantillon_parite(scaler))
+    ecrire_sommes([*pickles, chemin], sommes_path)
+    print(f"✅ {chemin} écrit ({os.path.getsize(chemin)} octets, écart max {ecart:.2g})")
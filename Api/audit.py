@@ -0,0 +1,295 @@
+"""Journal d'audit des décisions de crédit, en ajout seul.
+
+Les handlers déposent leurs lots scorés dans un tampon circulaire en mémoire ;
+un thread d'écriture les vide par lots dans des segments JSONL compressés
+(gzip), tournés par taille ou par durée. Une ligne par client scoré :
+
+    {"ts": 1760800000.12, "date": "2026-10-18T15:06:40.120Z", "endpoint": "/predict",
+     "version": "v1", "entrees": {...11 variables...}, "probabilite": 0.62, "decision": "Accepté"}
+
+Lecture en flux, filtrée par période et par décision :
+
+    python Api/audit.py --depuis 2026-10-18T08:00 --jusqu-a 2026-10-18T18:00 --decision Refusé
+    python Api/audit.py --version v1 --compter
+"""
+import argparse
+import calendar
+import gzip
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from encodage import FEATURES
+
+DOSSIER_AUDIT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audit")
+POLITIQUES = ("ecraser", "rejeter", "bloquer")
+DECISIONS = ("Refusé", "Accepté")
+TRANCHE = 32
+_GABARIT = ('%s, "entrees": {' + ", ".join(f'"{f}": %r' for f in FEATURES)
+            + '}, "probabilite": %.6g, "decision": "%s"}')
+
+
+def _fini(valeur):
+    return valeur if math.isfinite(valeur) else None
+
+
+def _ligne_json(debut, ligne, probability, decision):
+    """Ligne complète via json.dumps : valeurs non finies écrites null (JSON valide)."""
+    suite = json.dumps({"entrees": dict(zip(FEATURES, map(_fini, ligne))),
+                        "probabilite": _fini(float(probability)), "decision": decision},
+                       ensure_ascii=False)
+    return f"{debut}, {suite[1:]}"
+
+
+def _date(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts)) + f".{int(ts % 1 * 1000):03d}Z"
+
+
+class JournalAudit:
+    """Tampon circulaire borné + écriture par lots en arrière-plan.
+
+    `capacite` : nombre de lignes en mémoire au plus. Quand il est plein,
+    `politique` décide : "ecraser" abandonne les lignes les plus anciennes,
+    "rejeter" les nouvelles, "bloquer" fait attendre l'appelant au plus
+    `attente_ms` puis rejette (à n'appeler que hors de la boucle d'événements,
+    voir api_scoring.auditer_async). Les lignes perdues sont comptées.
+    `fsync_s` : durabilité ; 0 = fsync à chaque lot écrit, > 0 = au plus
+    toutes les fsync_s secondes, < 0 = laissé au système.
+    """
+
+    def __init__(self, dossier=DOSSIER_AUDIT, capacite=100000, politique="ecraser", intervalle_ms=200.0,
+                 taille_lot=5000, fsync_s=1.0, taille_segment=64 * 1024 * 1024, duree_segment=3600.0,
+                 attente_ms=5.0, compression=1):
+        if politique not in POLITIQUES:
+            raise ValueError(f"Politique inconnue : {politique} (attendu : {', '.join(POLITIQUES)})")
+        self.dossier = dossier
+        self.capacite = capacite
+        self.politique = politique
+        self.intervalle = intervalle_ms / 1000.0
+        self.taille_lot = taille_lot
+        self.fsync_s = fsync_s
+        self.taille_segment = taille_segment
+        self.duree_segment = duree_segment
+        self.attente = attente_ms / 1000.0
+        self.compression = compression
+        self.recues = 0
+        self.ecrites = 0
+        self.pertes = 0
+        self.segments = 0
+        self._tampon = deque()
+        self._lignes = 0
+        self._condition = threading.Condition()
+        self._arret = False
+        self._thread = None
+        self._brut = self._gzip = None
+        self._debut_segment = 0.0
+        self._dernier_fsync = 0.0
+
+    def demarrer(self):
+        os.makedirs(self.dossier, exist_ok=True)
+        self._arret = False
+        self._thread = threading.Thread(target=self._boucle, name="audit", daemon=True)
+        self._thread.start()
+
+    def arreter(self):
+        """Vide le tampon, ferme le segment courant et attend le thread."""
+        with self._condition:
+            self._arret = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def enregistrer(self, endpoint, version, input_data, predictions, probabilities):
+        """Dépose un lot scoré ; renvoie False si la politique l'a rejeté."""
+        n = len(input_data)
+        if not n:
+            return True
+        entree = (time.time(), endpoint, version, input_data, predictions, probabilities)
+        with self._condition:
+            self.recues += n
+            if self._lignes + n > self.capacite and self.politique == "bloquer":
+                self._condition.wait_for(lambda: self._lignes + n <= self.capacite or self._arret,
+                                         timeout=self.attente)
+            if self._lignes + n > self.capacite:
+                if self.politique != "ecraser" or n > self.capacite:
+                    self.pertes += n
+                    return False
+                while self._lignes + n > self.capacite:
+                    ancienne = self._tampon.popleft()
+                    self._lignes -= len(ancienne[3])
+                    self.pertes += len(ancienne[3])
+            self._tampon.append(entree)
+            self._lignes += n
+            if self._lignes >= self.taille_lot:
+                self._condition.notify_all()
+        return True
+
+    def _boucle(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._arret or self._lignes >= self.taille_lot,
+                                         timeout=self.intervalle)
+                entrees = list(self._tampon)
+                self._tampon.clear()
+                self._lignes = 0
+                arret = self._arret
+                # Réveille les appelants en attente (politique "bloquer")
+                self._condition.notify_all()
+            try:
+                if entrees:
+                    self._ecrire(entrees)
+                self._synchroniser()
+            except OSError as e:
+                self.pertes += sum(len(entree[3]) for entree in entrees)
+                print(f"⚠️ Journal d'audit : écriture impossible ({e})", file=sys.stderr)
+            if arret:
+                self._fermer_segment()
+                return
+
+    def _ecrire(self, entrees):
+        # Sérialisation par gabarit plutôt qu'un json.dumps par ligne, et par
+        # tranches entre lesquelles le thread rend le GIL : les requêtes en
+        # cours ne restent pas bloquées derrière un gros lot (visible sur le p99)
+        lignes = []
+        contextes = {}
+        for ts, endpoint, version, input_data, predictions, probabilities in entrees:
+            contexte = contextes.get((endpoint, version))
+            if contexte is None:
+                contexte = contextes[(endpoint, version)] = json.dumps(
+                    {"endpoint": endpoint, "version": version}, ensure_ascii=False)[1:-1]
+            debut = '{"ts": %.3f, "date": "%s", %s' % (ts, _date(ts), contexte)
+            # Le gabarit écrirait nan / inf tels quels : lot non fini -> json.dumps
+            finies = np.isfinite(input_data).all() and np.isfinite(probabilities).all()
+            for ligne, prediction, probability in zip(input_data.tolist(), predictions, probabilities):
+                if finies:
+                    lignes.append(_GABARIT % (debut, *ligne, probability, DECISIONS[int(prediction)]))
+                else:
+                    lignes.append(_ligne_json(debut, ligne, probability, DECISIONS[int(prediction)]))
+            if len(lignes) % TRANCHE < len(input_data):
+                time.sleep(0)
+        donnees = "\n".join(lignes).encode() + b"\n"
+
+        if (self._gzip is None or self._brut.tell() >= self.taille_segment
+                or time.time() - self._debut_segment >= self.duree_segment):
+            self._ouvrir_segment()
+        self._gzip.write(donnees)
+        # Z_SYNC_FLUSH : les lignes écrites sont lisibles même segment ouvert
+        self._gzip.flush()
+        self.ecrites += len(lignes)
+
+    def _synchroniser(self, force=False):
+        if self._brut is None or self.fsync_s < 0:
+            return
+        maintenant = time.monotonic()
+        if force or maintenant - self._dernier_fsync >= self.fsync_s:
+            self._brut.flush()
+            os.fsync(self._brut.fileno())
+            self._dernier_fsync = maintenant
+
+    def _ouvrir_segment(self):
+        self._fermer_segment()
+        self._debut_segment = time.time()
+        # Le pid évite les collisions entre workers uvicorn partageant le dossier
+        horodatage = time.strftime("%Y%m%dT%H%M%S", time.gmtime(self._debut_segment))
+        nom = f"audit-{horodatage}-{os.getpid()}-{self.segments:04d}.jsonl.gz"
+        self._brut = open(os.path.join(self.dossier, nom), "ab")
+        self._gzip = gzip.GzipFile(fileobj=self._brut, mode="wb", compresslevel=self.compression)
+        self.segments += 1
+
+    def _fermer_segment(self):
+        if self._gzip is not None:
+            self._gzip.close()
+            self._synchroniser(force=True)
+            self._brut.close()
+            self._brut = self._gzip = None
+
+    def stats(self):
+        return {
+            "recues": self.recues,
+            "ecrites": self.ecrites,
+            "pertes": self.pertes,
+            "en_attente": self._lignes,
+            "segments": self.segments,
+            "politique": self.politique,
+        }
+
+
+def segments(dossier=DOSSIER_AUDIT):
+    """Segments du dossier triés par date de début : [(debut_ts, chemin), ...]."""
+    if not os.path.isdir(dossier):
+        return []
+    resultat = []
+    for nom in os.listdir(dossier):
+        if nom.startswith("audit-") and nom.endswith(".jsonl.gz"):
+            debut = calendar.timegm(time.strptime(nom[6:21], "%Y%m%dT%H%M%S"))
+            resultat.append((debut, os.path.join(dossier, nom)))
+    return sorted(resultat)
+
+
+def lire(dossier=DOSSIER_AUDIT, depuis=None, jusqu_a=None, decision=None, version=None):
+    """Itère sur les lignes d'audit, filtrées par période (timestamps), décision et version.
+
+    Les segments entièrement hors de la période ne sont pas ouverts : un segment
+    couvre de sa date de début (nom du fichier) à sa dernière écriture (mtime),
+    que d'autres workers aient ouvert des segments entre-temps ou non. Les
+    lignes illisibles (ligne tronquée, ancien format) sont ignorées.
+    """
+    for debut, chemin in segments(dossier):
+        if jusqu_a is not None and debut > jusqu_a:
+            break
+        if depuis is not None and os.path.getmtime(chemin) + 1 < depuis:
+            continue
+        with gzip.open(chemin, "rt", encoding="utf-8") as f:
+            try:
+                for ligne in f:
+                    try:
+                        enregistrement = json.loads(ligne)
+                    except ValueError:
+                        continue
+                    ts = enregistrement["ts"]
+                    if depuis is not None and ts < depuis:
+                        continue
+                    if jusqu_a is not None and ts > jusqu_a:
+                        continue
+                    if decision is not None and enregistrement["decision"] != decision:
+                        continue
+                    if version is not None and enregistrement["version"] != version:
+                        continue
+                    yield enregistrement
+            except EOFError:
+                # Segment en cours d'écriture (ou interrompu) : lignes complètes seulement
+                pass
+
+
+def _horodatage(texte):
+    return datetime.fromisoformat(texte).timestamp() if texte else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dossier", default=os.getenv("AUDIT_DOSSIER", DOSSIER_AUDIT))
+    parser.add_argument("--depuis", help="Date ISO (heure locale sauf fuseau explicite)")
+    parser.add_argument("--jusqu-a", dest="jusqu_a", help="Date ISO (heure locale sauf fuseau explicite)")
+    parser.add_argument("--decision", choices=DECISIONS)
+    parser.add_argument("--version")
+    parser.add_argument("--compter", action="store_true", help="Affiche seulement le nombre de lignes")
+    args = parser.parse_args(argv)
+
+    lignes = lire(args.dossier, _horodatage(args.depuis), _horodatage(args.jusqu_a), args.decision, args.version)
+    if args.compter:
+        print(sum(1 for _ in lignes))
+        return
+    for enregistrement in lignes:
+        sys.stdout.write(json.dumps(enregistrement, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachePredictions:
+    """Cache LRU borné avec expiration (TTL) des résultats de scoring.
+
+    La clé est le vecteur des 11 variables converti en floats, donc
+    `{"Gender": 1}` et `{"Gender": 1.0}` tombent sur la même entrée.
+    Le cache est vidé dès que la version des artefacts change.
+    """
+
+    def __init__(self, taille_max=10000, ttl=3600.0, version=None):
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    @staticmethod
+    def cle(ligne):
+        return tuple(float(v) for v in ligne)
+
+    def _verifier_version(self, version):
+        if version != self.version:
+            self._entrees.clear()
+            self.version = version
+
+    def get(self, cle, version=None):
+        if self.taille_max <= 0:
+            # Cache désactivé : ni hit ni miss, le ratio de /cache/stats reste significatif
+            return None
+        with self._verrou:
+            self._verifier_version(version)
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.misses += 1
+                return None
+            expiration, valeur = entree
+            if expiration < time.monotonic():
+                del self._entrees[cle]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+            return valeur
+
+    def set(self, cle, valeur, version=None):
+        if self.taille_max <= 0:
+            return
+        with self._verrou:
+            self._verifier_version(version)
+            self._entrees[cle] = (time.monotonic() + self.ttl, valeur)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+
+    def stats(self):
+        with self._verrou:
+            return {
+                "taille": len(self._entrees),
+                "taille_max": self.taille_max,
+                "ttl": self.ttl,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
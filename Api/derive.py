@@ -0,0 +1,210 @@
+"""Suivi de la dérive des entrées et des scores, en mémoire constante.
+
+Chaque variable (et la probabilité prédite) est résumée par un histogramme à
+bornes fixes, tirées du profil de référence calculé sur data/train.csv :
+ajouter un lot coûte une comparaison vectorisée, la mémoire ne dépend pas du
+trafic et deux moniteurs de même profil se fusionnent en sommant leurs comptes.
+Les valeurs manquantes et hors du domaine de référence sont comptées à part.
+
+    python Api/derive.py                 # régénère Api/profil_reference.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from encodage import FEATURES
+
+PROFIL_NOM = "profil_reference.json"
+PROFIL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), PROFIL_NOM)
+INTERVALLES = 10
+BORNES_PROBABILITE = np.linspace(0.0, 1.0, 21)[1:-1]
+# Seuils usuels du PSI
+SEUILS_PSI = ((0.1, "stable"), (0.25, "moderee"), (float("inf"), "forte"))
+_EPSILON = 1e-4
+
+
+def bornes_variable(valeurs, intervalles=INTERVALLES):
+    """Bornes intérieures : milieux entre codes pour une variable discrète,
+    quantiles sinon."""
+    uniques = np.unique(valeurs)
+    if len(uniques) <= intervalles:
+        return ((uniques[1:] + uniques[:-1]) / 2).tolist()
+    quantiles = np.quantile(valeurs, np.linspace(0, 1, intervalles + 1)[1:-1])
+    return np.unique(quantiles).tolist()
+
+
+def _comptes(valeurs, bornes):
+    return np.bincount(np.searchsorted(bornes, valeurs, side="right"), minlength=len(bornes) + 1)
+
+
+def construire_profil(X, probabilities=None, version=None, source=None, intervalles=INTERVALLES):
+    """Profil de référence : bornes, comptes et domaine de chaque variable."""
+    X = X[np.isfinite(X).all(axis=1)]
+    profil = {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "source": source, "version": version,
+              "lignes": len(X), "variables": {}}
+    for j, feature in enumerate(FEATURES):
+        bornes = bornes_variable(X[:, j], intervalles)
+        profil["variables"][feature] = {
+            "bornes": bornes,
+            "comptes": _comptes(X[:, j], bornes).tolist(),
+            "min": float(X[:, j].min()),
+            "max": float(X[:, j].max()),
+        }
+    if probabilities is not None:
+        profil["probabilite"] = {
+            "bornes": BORNES_PROBABILITE.tolist(),
+            "comptes": _comptes(probabilities, BORNES_PROBABILITE).tolist(),
+        }
+    return profil
+
+
+def charger_profil(chemin=PROFIL_PATH):
+    with open(chemin) as f:
+        return json.load(f)
+
+
+def psi(reference, courant):
+    """Population Stability Index entre deux histogrammes de mêmes bornes."""
+    p = np.maximum(np.asarray(reference, dtype=float) / max(sum(reference), 1), _EPSILON)
+    q = np.maximum(np.asarray(courant, dtype=float) / max(sum(courant), 1), _EPSILON)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(reference, courant):
+    """Statistique de Kolmogorov-Smirnov évaluée aux bornes des intervalles."""
+    p = np.cumsum(reference) / max(sum(reference), 1)
+    q = np.cumsum(courant) / max(sum(courant), 1)
+    return float(np.max(np.abs(p - q)))
+
+
+def niveau(valeur):
+    return next(nom for seuil, nom in SEUILS_PSI if valeur < seuil)
+
+
+class Moniteur:
+    """Histogrammes courants, alignés sur les bornes du profil de référence.
+
+    Toutes les variables partagent une matrice (11, k) de bornes complétée
+    par +inf : un lot de n lignes se range en une seule comparaison
+    (n, 11, k) puis un seul bincount.
+    """
+
+    def __init__(self, profil):
+        self.profil = profil
+        variables = [profil["variables"][feature] for feature in FEATURES]
+        self.largeur = max(len(v["bornes"]) for v in variables) + 1
+        self.bornes = np.full((len(FEATURES), self.largeur - 1), np.inf)
+        for j, v in enumerate(variables):
+            self.bornes[j, :len(v["bornes"])] = v["bornes"]
+        self.nb_intervalles = np.array([len(v["bornes"]) + 1 for v in variables])
+        self.minimum = np.array([v["min"] for v in variables])
+        self.maximum = np.array([v["max"] for v in variables])
+        self._decalages = np.arange(len(FEATURES)) * self.largeur
+        self._verrou = threading.Lock()
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        with self._verrou:
+            self.debut = time.time()
+            self.lignes = 0
+            self.comptes = np.zeros((len(FEATURES), self.largeur), dtype=np.int64)
+            self.manquantes = np.zeros(len(FEATURES), dtype=np.int64)
+            self.hors_domaine = np.zeros(len(FEATURES), dtype=np.int64)
+            self.probabilites = np.zeros(len(BORNES_PROBABILITE) + 1, dtype=np.int64)
+
+    def observer(self, input_data, probabilities=None):
+        """Ajoute un lot (n, 11) et, s'il y en a, ses probabilités."""
+        X = np.asarray(input_data, dtype=float)
+        if not len(X):
+            return
+        finies = np.isfinite(X)
+        # NaN >= borne est faux : les manquantes tombent dans l'intervalle 0, retirées ensuite
+        indices = (X[:, :, None] >= self.bornes[None]).sum(axis=2) + self._decalages
+        comptes = np.bincount(indices[finies], minlength=self.comptes.size).reshape(self.comptes.shape)
+        manquantes = len(X) - finies.sum(axis=0)
+        hors_domaine = ((X < self.minimum) | (X > self.maximum)).sum(axis=0)
+        if probabilities is not None:
+            probas = np.bincount(np.searchsorted(BORNES_PROBABILITE, probabilities, side="right"),
+                                 minlength=len(self.probabilites))
+        with self._verrou:
+            self.lignes += len(X)
+            self.comptes += comptes
+            self.manquantes += manquantes
+            self.hors_domaine += hors_domaine
+            if probabilities is not None:
+                self.probabilites += probas
+
+    def fusionner(self, autre):
+        """Ajoute les comptes d'un autre moniteur de même profil (autre worker, autre fenêtre)."""
+        if not np.array_equal(self.bornes, autre.bornes):
+            raise ValueError("Moniteurs construits sur des profils différents")
+        with self._verrou:
+            self.lignes += autre.lignes
+            self.comptes += autre.comptes
+            self.manquantes += autre.manquantes
+            self.hors_domaine += autre.hors_domaine
+            self.probabilites += autre.probabilites
+
+    def rapport(self, details=False):
+        """PSI / KS de chaque variable et de la probabilité par rapport au profil."""
+        with self._verrou:
+            comptes = self.comptes.copy()
+            probabilites = self.probabilites.copy()
+            lignes, manquantes, hors_domaine = self.lignes, self.manquantes.copy(), self.hors_domaine.copy()
+
+        variables = {}
+        for j, feature in enumerate(FEATURES):
+            reference = self.profil["variables"][feature]["comptes"]
+            courant = comptes[j, :self.nb_intervalles[j]]
+            variables[feature] = self._comparer(reference, courant, details)
+            variables[feature].update(manquantes=int(manquantes[j]), hors_domaine=int(hors_domaine[j]))
+
+        resultat = {
+            "depuis": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.debut)),
+            "lignes": lignes,
+            "profil": {k: self.profil.get(k) for k in ("date", "source", "version", "lignes")},
+            "variables": variables,
+        }
+        if "probabilite" in self.profil and probabilites.sum():
+            resultat["probabilite"] = self._comparer(self.profil["probabilite"]["comptes"], probabilites, details)
+        return resultat
+
+    @staticmethod
+    def _comparer(reference, courant, details):
+        if not courant.sum():
+            return {"psi": None, "ks": None, "niveau": None}
+        valeur_psi = psi(reference, courant)
+        resultat = {"psi": round(valeur_psi, 4), "ks": round(ks(reference, courant), 4), "niveau": niveau(valeur_psi)}
+        if details:
+            resultat.update(reference=list(reference), courant=courant.tolist())
+        return resultat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--donnees", default=None, help="CSV de référence (défaut : data/train.csv)")
+    parser.add_argument("-o", "--sortie", default=PROFIL_PATH)
+    args = parser.parse_args(argv)
+
+    import registre
+    from entrainer import DONNEES_PATH, RACINE, charger_matrices
+
+    donnees = args.donnees or DONNEES_PATH
+    X, _, _ = charger_matrices(donnees)
+    # Probabilités de référence : modèle servi par défaut (registre/ACTIF ou artefacts d'Api/)
+    version = registre.version_active()
+    modele = (registre.charger_modele(registre.dossier_version(version), version) if version
+              else registre.charger_modele())
+    _, probabilities = modele.moteur.scorer(X)
+    profil = construire_profil(X, probabilities, modele.version, os.path.relpath(donnees, RACINE))
+    with open(args.sortie, "w") as f:
+        json.dump(profil, f, indent=2, ensure_ascii=False)
+    print(f"✅ Profil de référence ({len(X)} lignes, modèle {modele.version}) écrit dans {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Encodage et validation vectorisés des données clients, partagés par l'API,
+les scripts de scoring en masse et le front-end Streamlit."""
+import numpy as np
+
+# Ordre des colonnes attendu par le scaler et le modèle
+FEATURES = [
+    "Gender",
+    "Married",
+    "Dependents",
+    "Education",
+    "Self_Employed",
+    "ApplicantIncome",
+    "CoapplicantIncome",
+    "LoanAmount",
+    "Loan_Amount_Term",
+    "Credit_History",
+    "Property_Area",
+]
+
+# Libellés (anglais Kaggle ou français du front-end) -> code attendu par le modèle
+MAPPINGS = {
+    "Gender": {"Femme": 0, "Homme": 1, "Female": 0, "Male": 1},
+    "Married": {"Non Marié(e)": 0, "Marié(e)": 1, "No": 0, "Yes": 1},
+    "Dependents": {"0": 0, "1": 1, "2": 2, "3+": 3},
+    "Education": {"Supérieur": 0, "Non Supérieur": 1, "Graduate": 0, "Not Graduate": 1},
+    "Self_Employed": {"Non": 0, "Oui": 1, "No": 0, "Yes": 1},
+    "Credit_History": {"Mauvais": 0, "Bon": 1},
+    "Property_Area": {
+        "Rurale": 0, "Urbaine": 1, "Semi-urbaine": 2,
+        "Rural": 0, "Urban": 1, "Semiurban": 2,
+        "RURAL": 0, "URBAN": 1, "SEMIURBAN": 2
+    },
+}
+
+# Code -> libellé affiché dans le tableau de bord
+LIBELLES = {
+    "Gender": {0: "Femme", 1: "Homme"},
+    "Married": {0: "Non Marié(e)", 1: "Marié(e)"},
+    "Education": {0: "Supérieur", 1: "Non Supérieur"},
+    "Self_Employed": {0: "Non", 1: "Oui"},
+    "Credit_History": {0: "Mauvais", 1: "Bon"},
+    "Property_Area": {0: "Rurale", 1: "Urbaine", 2: "Semi-urbaine"},
+}
+
+# Codes autorisés pour les variables catégorielles ; les autres doivent être >= 0
+DOMAINES = {
+    "Gender": (0, 1),
+    "Married": (0, 1),
+    "Education": (0, 1),
+    "Self_Employed": (0, 1),
+    "Credit_History": (0, 1),
+    "Property_Area": (0, 1, 2),
+}
+
+# Politique d'imputation explicite des valeurs manquantes : LoanAmount -> médiane
+# de data/train.csv ; Credit_History -> 0 (« Mauvais »), choix prudent : un
+# historique inconnu n'est pas un bon historique. Appliquée par défaut partout
+# (entraînement, /predict/raw, score_csv.py, tableau de bord) pour qu'un même
+# client reçoive la même décision ; imputer=False écarte ces lignes.
+IMPUTATION = {
+    "LoanAmount": 128.0,
+    "Credit_History": 0.0,
+}
+
+
+def vers_dataframe(donnees):
+    """Accepte un DataFrame, une liste de dicts ou un tableau (n, 11)."""
+    # Import différé : l'API n'a pas besoin de pandas pour démarrer
+    import pandas as pd
+
+    if isinstance(donnees, pd.DataFrame):
+        return donnees
+    if isinstance(donnees, np.ndarray):
+        return pd.DataFrame(np.atleast_2d(donnees), columns=FEATURES)
+    return pd.DataFrame.from_records(list(donnees))
+
+
+def encoder_colonne(serie, mapping=None):
+    """Encode une colonne : libellés via `mapping`, valeurs déjà numériques conservées."""
+    import pandas as pd
+
+    numerique = pd.to_numeric(serie, errors="coerce")
+    if mapping is None:
+        return numerique.astype(float)
+    return serie.map(mapping).astype(float).fillna(numerique)
+
+
+def encoder(donnees, imputer=True):
+    """Transforme des données brutes (format Kaggle) en matrice float (n, 11).
+
+    Les valeurs manquantes ou non reconnues restent à NaN, sauf celles
+    couvertes par IMPUTATION quand `imputer` est vrai.
+    """
+    X, _, _ = encoder_et_valider(donnees, imputer=imputer, details=False)
+    return X
+
+
+def encoder_et_valider(donnees, imputer=True, details=True):
+    """Encode puis valide en bloc.
+
+    Renvoie (X, valides, erreurs) : la matrice (n, 11), le masque des lignes
+    utilisables et la liste des erreurs {"ligne", "champ", "valeur", "raison"}
+    (vide si `details` est faux).
+    """
+    df = vers_dataframe(donnees)
+    n = len(df)
+    if n == 0:
+        return np.empty((0, len(FEATURES))), np.zeros(0, dtype=bool), []
+
+    X = np.empty((n, len(FEATURES)))
+    absentes = np.zeros((n, len(FEATURES)), dtype=bool)
+    for j, feature in enumerate(FEATURES):
+        if feature not in df.columns:
+            X[:, j] = np.nan
+            absentes[:, j] = True
+            continue
+        X[:, j] = encoder_colonne(df[feature], MAPPINGS.get(feature)).to_numpy(dtype=float)
+        absentes[:, j] = df[feature].isna().to_numpy()
+
+    if imputer:
+        for feature, valeur in IMPUTATION.items():
+            j = FEATURES.index(feature)
+            X[absentes[:, j], j] = valeur
+            absentes[:, j] = False
+
+    # Toutes les vérifications sont des masques (n, 11) calculés en une fois
+    non_reconnues = ~absentes & ~np.isfinite(X)
+    hors_domaine = np.isfinite(X) & (X < 0)
+    for feature, codes in DOMAINES.items():
+        j = FEATURES.index(feature)
+        hors_domaine[:, j] |= np.isfinite(X[:, j]) & ~np.isin(X[:, j], codes)
+    j = FEATURES.index("Loan_Amount_Term")
+    hors_domaine[:, j] |= X[:, j] == 0
+
+    erreurs = []
+    if details:
+        for raison, masque in (("manquante", absentes), ("non reconnue", non_reconnues),
+                               ("hors domaine", hors_domaine)):
+            for i, j in zip(*np.nonzero(masque)):
+                feature = FEATURES[j]
+                valeur = df[feature].iat[i] if feature in df.columns else None
+                erreurs.append({"ligne": int(i), "champ": feature, "valeur": _json(valeur), "raison": raison})
+        erreurs.sort(key=lambda e: (e["ligne"], FEATURES.index(e["champ"])))
+
+    # Cellules rejetées à NaN : lignes_valides(X) coïncide avec `valides`
+    X[non_reconnues | hors_domaine] = np.nan
+    valides = ~(absentes | non_reconnues | hors_domaine).any(axis=1)
+    return X, valides, erreurs
+
+
+def _json(valeur):
+    """Valeur brute sérialisable en JSON (NaN -> None, types numpy -> Python)."""
+    if valeur is None:
+        return None
+    if isinstance(valeur, np.generic):
+        valeur = valeur.item()
+    if isinstance(valeur, float) and not np.isfinite(valeur):
+        return None
+    return valeur
+
+
+def lignes_valides(X):
+    """Masque des lignes sans NaN ni infini."""
+    return np.isfinite(X).all(axis=1)
+
+
+def libelle(feature, valeur):
+    """Libellé d'affichage d'un code ; la valeur brute si elle n'est pas codée."""
+    return LIBELLES.get(feature, {}).get(valeur, valeur)
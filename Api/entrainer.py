@@ -0,0 +1,263 @@
+"""Entraînement reproductible du scaler et du modèle servis par l'API.
+
+Lit data/train.csv, applique l'encodage et l'imputation partagés (encodage.py),
+cherche C par validation croisée parallèle puis enregistre une nouvelle version
+dans le registre avec un rapport de durées et de métriques.
+
+    python Api/entrainer.py                               # nouvelle version dans le registre
+    python Api/entrainer.py --activer --racine            # active + remplace les artefacts d'Api/
+    python Api/entrainer.py --warm-start v20261018-120000 --nouvelles data/nouveaux.csv
+
+Les matrices encodées sont mises en cache (data/cache/) : la clé tient compte
+du fichier de données et du code d'encodage.
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import platform
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import encodage
+import registre
+from artefacts import (
+    COMPACT_PATH, MODEL_PATH, SCALER_PATH, charger_artefacts, ecrire_sommes, exporter_compact, sha256_fichier,
+)
+from derive import PROFIL_NOM, PROFIL_PATH, construire_profil
+from encodage import FEATURES, encoder_et_valider
+from moteurs import MoteurCompile, MoteurSklearn, verifier_parite
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DONNEES_PATH = os.path.join(RACINE, "data", "train.csv")
+CACHE_PATH = os.path.join(RACINE, "data", "cache")
+CIBLE = "Loan_Status"
+# Classe 1 = "Accepté" pour l'API
+CIBLE_CODES = {"Y": 1, "N": 0}
+GRILLE_C = (0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0)
+
+
+class Chrono:
+    """Durées (ms) des étapes de l'entraînement, reprises dans le rapport."""
+
+    def __init__(self):
+        self.durees_ms = {}
+
+    @contextmanager
+    def etape(self, nom):
+        debut = time.perf_counter()
+        yield
+        self.durees_ms[nom] = round((time.perf_counter() - debut) * 1000, 2)
+
+
+def charger_matrices(chemin, imputer=True, cache=CACHE_PATH):
+    """(X, y, cache_utilise) : lignes valides encodées et cible 0/1.
+
+    Le résultat est mis en cache dans un .npz dont le nom dépend du contenu
+    du CSV, du code d'encodage et de l'imputation.
+    """
+    cle = hashlib.sha256(
+        f"{sha256_fichier(chemin)}:{sha256_fichier(encodage.__file__)}:{imputer}".encode()
+    ).hexdigest()[:16]
+    chemin_cache = os.path.join(cache, f"{os.path.splitext(os.path.basename(chemin))[0]}-{cle}.npz") if cache else None
+    if chemin_cache and os.path.exists(chemin_cache):
+        with np.load(chemin_cache, allow_pickle=False) as f:
+            return f["X"], f["y"], True
+
+    import pandas as pd
+
+    df = pd.read_csv(chemin)
+    if CIBLE not in df.columns:
+        raise SystemExit(f"❌ Colonne cible {CIBLE} absente de {chemin}")
+    X, valides, _ = encoder_et_valider(df, imputer=imputer, details=False)
+    y = df[CIBLE].map(CIBLE_CODES).to_numpy(dtype=float)
+    valides &= np.isfinite(y)
+    X, y = X[valides], y[valides].astype(int)
+
+    if chemin_cache:
+        os.makedirs(cache, exist_ok=True)
+        temporaire = chemin_cache + ".tmp.npz"
+        np.savez(temporaire, X=X, y=y)
+        os.replace(temporaire, chemin_cache)
+    return X, y, False
+
+
+def evaluer(model, scaler, X, y):
+    """Métriques sur le jeu de test (classe positive = 1, "Accepté")."""
+    from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score, roc_auc_score
+
+    X_scaled = scaler.transform(X)
+    predictions = model.predict(X_scaled)
+    probabilities = model.predict_proba(X_scaled)[:, 1]
+    return {
+        "auc": round(float(roc_auc_score(y, probabilities)), 4),
+        "accuracy": round(float(accuracy_score(y, predictions)), 4),
+        "precision": round(float(precision_score(y, predictions)), 4),
+        "rappel": round(float(recall_score(y, predictions)), 4),
+        "f1": round(float(f1_score(y, predictions)), 4),
+        "matrice_confusion": confusion_matrix(y, predictions).tolist(),
+    }
+
+
+def rechercher(X, y, grille=GRILLE_C, plis=5, n_jobs=-1, seed=42):
+    """Validation croisée stratifiée de la chaîne MinMax + régression logistique, C sur la grille."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import MinMaxScaler
+
+    chaine = Pipeline([
+        ("scaler", MinMaxScaler()),
+        ("modele", LogisticRegression(class_weight="balanced", max_iter=1000)),
+    ])
+    recherche = GridSearchCV(
+        chaine,
+        {"modele__C": list(grille)},
+        scoring={"auc": "roc_auc", "accuracy": "accuracy", "f1": "f1"},
+        refit="auc",
+        cv=StratifiedKFold(plis, shuffle=True, random_state=seed),
+        n_jobs=n_jobs,
+    )
+    recherche.fit(X, y)
+    resultats = recherche.cv_results_
+    validation = [
+        {"C": float(c), **{m: round(float(resultats[f"mean_test_{m}"][i]), 4) for m in ("auc", "accuracy", "f1")}}
+        for i, c in enumerate(resultats["param_modele__C"])
+    ]
+    meilleure = recherche.best_estimator_
+    return meilleure.named_steps["scaler"], meilleure.named_steps["modele"], {
+        "meilleur_C": float(recherche.best_params_["modele__C"]),
+        "auc_cv": round(float(recherche.best_score_), 4),
+        "plis": plis,
+        "grille": validation,
+    }
+
+
+def affiner(model, scaler, X, y):
+    """Réajustement à chaud : le scaler élargit son domaine (partial_fit) et la
+    régression repart des coefficients existants (warm_start)."""
+    scaler = copy.deepcopy(scaler).partial_fit(X)
+    model = copy.deepcopy(model).set_params(warm_start=True)
+    model.fit(scaler.transform(X), y)
+    return scaler, model.set_params(warm_start=False)
+
+
+def ecrire_racine(model, scaler):
+    """Remplace les artefacts servis sans registre (Api/*.pkl, format compact, sommes)."""
+    import joblib
+
+    joblib.dump(model, MODEL_PATH)
+    joblib.dump(scaler, SCALER_PATH)
+    exporter_compact(model, scaler, COMPACT_PATH)
+    ecrire_sommes([MODEL_PATH, SCALER_PATH, COMPACT_PATH])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--donnees", default=DONNEES_PATH, help="CSV d'entraînement (format Kaggle)")
+    parser.add_argument("--sans-imputation", dest="imputer", action="store_false",
+                        help="Écarter les lignes incomplètes au lieu d'imputer (encodage.IMPUTATION)")
+    parser.add_argument("--grille", default=",".join(map(str, GRILLE_C)), help="Valeurs de C, séparées par des virgules")
+    parser.add_argument("--plis", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Processus pour la validation croisée (-1 = tous les cœurs)")
+    parser.add_argument("--test", type=float, default=0.2, help="Part réservée au test")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", default=CACHE_PATH, help="Dossier du cache des matrices encodées ('' = désactivé)")
+    parser.add_argument("--warm-start", metavar="VERSION",
+                        help="Réajuster cette version du registre ('actif' = version active) au lieu de chercher C")
+    parser.add_argument("--nouvelles", help="CSV de nouvelles lignes étiquetées ajoutées aux données (avec --warm-start)")
+    parser.add_argument("--version", help="Nom de la version (défaut : horodatage)")
+    parser.add_argument("--activer", action="store_true", help="Activer la version dans le registre")
+    parser.add_argument("--racine", action="store_true", help="Remplacer aussi les artefacts d'Api/")
+    parser.add_argument("-o", "--rapport", help="Copie du rapport JSON")
+    args = parser.parse_args(argv)
+
+    from sklearn.model_selection import train_test_split
+    import sklearn
+
+    chrono = Chrono()
+    with chrono.etape("encodage"):
+        X, y, cache_utilise = charger_matrices(args.donnees, args.imputer, args.cache)
+        sources = [os.path.relpath(args.donnees, RACINE)]
+        if args.nouvelles:
+            X_nouv, y_nouv, _ = charger_matrices(args.nouvelles, args.imputer, args.cache)
+            X, y = np.vstack([X, X_nouv]), np.concatenate([y, y_nouv])
+            sources.append(os.path.relpath(args.nouvelles, RACINE))
+
+    # Même découpage que le notebook : 80/20 stratifié, random_state=42
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.test, stratify=y, random_state=args.seed)
+
+    if args.warm_start:
+        parent = registre.version_active() if args.warm_start == "actif" else args.warm_start
+        if parent is None:
+            raise SystemExit("❌ Aucune version active dans le registre")
+        dossier = registre.dossier_version(parent)
+        model, scaler = charger_artefacts(os.path.join(dossier, registre.MODEL_NOM),
+                                          os.path.join(dossier, registre.SCALER_NOM),
+                                          os.path.join(dossier, registre.SOMMES_NOM))
+        with chrono.etape("ajustement"):
+            scaler, model = affiner(model, scaler, X_train, y_train)
+        recherche = {"warm_start": parent, "iterations": int(np.max(model.n_iter_))}
+    else:
+        grille = [float(c) for c in args.grille.split(",")]
+        with chrono.etape("recherche"):
+            scaler, model, recherche = rechercher(X_train, y_train, grille, args.plis, args.n_jobs, args.seed)
+        recherche["iterations"] = int(np.max(model.n_iter_))
+
+    with chrono.etape("evaluation"):
+        metriques = evaluer(model, scaler, X_test, y_test)
+        # Le moteur compilé de l'API doit reproduire la chaîne sklearn
+        ecart = verifier_parite(MoteurCompile(model, scaler), MoteurSklearn(model, scaler), X_test)
+
+    with chrono.etape("ecriture"):
+        version = registre.enregistrer(model, scaler, args.version, metriques, source=", ".join(sources))
+        # Profil de référence du suivi de dérive, sur toutes les lignes et avec ce modèle
+        _, probabilities = MoteurCompile(model, scaler).scorer(X)
+        profil = construire_profil(X, probabilities, version, ", ".join(sources))
+        chemins_profil = [os.path.join(registre.dossier_version(version), PROFIL_NOM)]
+        if args.racine:
+            ecrire_racine(model, scaler)
+            chemins_profil.append(PROFIL_PATH)
+        for chemin in chemins_profil:
+            with open(chemin, "w") as f:
+                json.dump(profil, f, indent=2, ensure_ascii=False)
+        if args.activer:
+            registre.activer(version)
+
+    rapport = {
+        "version": version,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sources": sources,
+        "lignes": {"entrainement": len(y_train), "test": len(y_test), "positifs": int(y.sum())},
+        "imputation": args.imputer,
+        "cache_matrices": cache_utilise,
+        "features": FEATURES,
+        "recherche": recherche,
+        "metriques_test": metriques,
+        "ecart_parite_moteur_compile": ecart,
+        "durees_ms": chrono.durees_ms,
+        "contexte": {
+            "python": platform.python_version(),
+            "sklearn": sklearn.__version__,
+            "numpy": np.__version__,
+            "cpu": os.cpu_count(),
+            "n_jobs": args.n_jobs,
+        },
+    }
+    chemins = [os.path.join(registre.dossier_version(version), "rapport_entrainement.json")]
+    if args.rapport:
+        chemins.append(args.rapport)
+    for chemin in chemins:
+        with open(chemin, "w") as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ Version {version}{' activée' if args.activer else ''} : AUC test {metriques['auc']}, "
+          f"accuracy {metriques['accuracy']}, f1 {metriques['f1']} — durées {chrono.durees_ms}")
+
+
+if __name__ == "__main__":
+    main()
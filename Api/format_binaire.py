@@ -0,0 +1,46 @@
+"""Format binaire des requêtes de scoring machine à machine.
+
+Requête : en-tête de 16 octets puis la matrice (n, 11) en little-endian, par lignes.
+    magic  b"SCRM" | version (u8) | taille d'un élément : 4 ou 8 (u8)
+    nombre de colonnes (u16, = 11) | nombre de lignes (u32) | 4 octets de bourrage
+Réponse : vecteur des n probabilités, même type flottant que la requête, sans en-tête
+(le nombre de lignes est rappelé dans l'en-tête HTTP X-Lignes).
+"""
+import struct
+
+import numpy as np
+
+CONTENT_TYPE = "application/x-scoring-matrix"
+MAGIC = b"SCRM"
+VERSION = 1
+EN_TETE = struct.Struct("<4sBBHI4x")
+DTYPES = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+
+
+def empaqueter(X, dtype="<f8"):
+    """Sérialise une matrice (n, k) ; utile côté client et pour les tests de charge."""
+    dtype = np.dtype(dtype).newbyteorder("<")
+    X = np.ascontiguousarray(X, dtype=dtype)
+    return EN_TETE.pack(MAGIC, VERSION, dtype.itemsize, X.shape[1], X.shape[0]) + X.tobytes()
+
+
+def depaqueter(corps, n_colonnes):
+    """Vue numpy (sans copie) sur le corps de la requête ; lève ValueError si invalide."""
+    if len(corps) < EN_TETE.size:
+        raise ValueError("En-tête binaire incomplet")
+    magic, version, taille, colonnes, lignes = EN_TETE.unpack_from(corps)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Format binaire non reconnu")
+    if taille not in DTYPES:
+        raise ValueError(f"Taille d'élément non supportée : {taille} (4 ou 8)")
+    if colonnes != n_colonnes:
+        raise ValueError(f"{colonnes} colonnes reçues, {n_colonnes} attendues")
+    attendu = EN_TETE.size + lignes * colonnes * taille
+    if len(corps) != attendu:
+        raise ValueError(f"Taille du corps incohérente : {len(corps)} octets, {attendu} attendus")
+    return np.frombuffer(corps, dtype=DTYPES[taille], count=lignes * colonnes,
+                         offset=EN_TETE.size).reshape(lignes, colonnes)
+
+
+def empaqueter_probabilites(probabilities, dtype):
+    return np.ascontiguousarray(probabilities, dtype=dtype).tobytes()
@@ -0,0 +1,205 @@
+"""Métriques au format d'exposition texte Prometheus, sans dépendance externe."""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+LATENCES = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+TAILLES_LOT = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PROBABILITES = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def _labels(noms, valeurs, extra=""):
+    paires = [f'{n}="{v}"' for n, v in zip(noms, valeurs)]
+    if extra:
+        paires.append(extra)
+    return "{" + ",".join(paires) + "}" if paires else ""
+
+
+def _nombre(v):
+    return repr(float(v)) if v != float("inf") else "+Inf"
+
+
+class Compteur:
+    type = "counter"
+
+    def __init__(self, nom, aide, labels=()):
+        self.nom, self.aide, self.labels = nom, aide, tuple(labels)
+        self._valeurs = {}
+        self._verrou = threading.Lock()
+
+    def inc(self, *labels, valeur=1):
+        with self._verrou:
+            self._valeurs[labels] = self._valeurs.get(labels, 0) + valeur
+
+    def lignes(self):
+        # Copie sous verrou : les handlers du threadpool ajoutent des séries pendant l'export
+        with self._verrou:
+            valeurs = list(self._valeurs.items())
+        for labels, valeur in sorted(valeurs):
+            yield f"{self.nom}{_labels(self.labels, labels)} {valeur}"
+
+
+class Histogramme:
+    type = "histogram"
+
+    def __init__(self, nom, aide, bornes, labels=()):
+        self.nom, self.aide, self.labels = nom, aide, tuple(labels)
+        self.bornes = tuple(bornes)
+        self._series = {}
+        self._verrou = threading.Lock()
+
+    def _serie(self, labels):
+        serie = self._series.get(labels)
+        if serie is None:
+            # [compte par intervalle (+Inf compris), somme, nombre]
+            serie = self._series[labels] = [[0] * (len(self.bornes) + 1), 0.0, 0]
+        return serie
+
+    def observer(self, valeur, *labels):
+        i = bisect_left(self.bornes, valeur)
+        with self._verrou:
+            serie = self._serie(labels)
+            serie[0][i] += 1
+            serie[1] += valeur
+            serie[2] += 1
+
+    def observer_lot(self, valeurs, *labels):
+        """Observation vectorisée d'un tableau de valeurs."""
+        valeurs = np.asarray(valeurs, dtype=float)
+        comptes = np.bincount(np.searchsorted(self.bornes, valeurs, side="left"),
+                              minlength=len(self.bornes) + 1)
+        with self._verrou:
+            serie = self._serie(labels)
+            for i, c in enumerate(comptes.tolist()):
+                serie[0][i] += c
+            serie[1] += float(valeurs.sum())
+            serie[2] += len(valeurs)
+
+    def lignes(self):
+        with self._verrou:
+            series = [(labels, (list(comptes), somme, nombre))
+                      for labels, (comptes, somme, nombre) in self._series.items()]
+        for labels, (comptes, somme, nombre) in sorted(series):
+            cumul = 0
+            for borne, c in zip(self.bornes + (float("inf"),), comptes):
+                cumul += c
+                le = 'le="%s"' % _nombre(borne)
+                yield f"{self.nom}_bucket{_labels(self.labels, labels, le)} {cumul}"
+            yield f"{self.nom}_sum{_labels(self.labels, labels)} {_nombre(somme)}"
+            yield f"{self.nom}_count{_labels(self.labels, labels)} {nombre}"
+
+
+class Registre:
+    def __init__(self):
+        self.metriques = []
+        self.collecteurs = []
+
+    def ajouter(self, metrique):
+        self.metriques.append(metrique)
+        return metrique
+
+    def exposer(self):
+        lignes = []
+        for m in self.metriques:
+            lignes.append(f"# HELP {m.nom} {m.aide}")
+            lignes.append(f"# TYPE {m.nom} {m.type}")
+            lignes.extend(m.lignes())
+        for collecteur in self.collecteurs:
+            lignes.extend(collecteur())
+        return "\n".join(lignes) + "\n"
+
+
+registre = Registre()
+
+requetes = registre.ajouter(Compteur(
+    "scoring_requetes_total", "Requêtes HTTP reçues", ("endpoint", "statut")))
+erreurs = registre.ajouter(Compteur(
+    "scoring_erreurs_total", "Requêtes HTTP terminées en erreur (statut >= 400)", ("endpoint",)))
+latence = registre.ajouter(Histogramme(
+    "scoring_latence_secondes", "Latence totale par endpoint", LATENCES, ("endpoint",)))
+etapes = registre.ajouter(Histogramme(
+    "scoring_etape_secondes", "Latence par étape du traitement", LATENCES, ("endpoint", "etape")))
+tailles_lot = registre.ajouter(Histogramme(
+    "scoring_taille_lot", "Nombre de lignes par appel au moteur", TAILLES_LOT))
+probabilites = registre.ajouter(Histogramme(
+    "scoring_probabilite_defaut", "Distribution des probabilités renvoyées", PROBABILITES))
+
+# Chronométrage de la requête courante, partagé entre le middleware et le handler
+_chrono = contextvars.ContextVar("chrono", default=None)
+
+
+def endpoint_courant():
+    chrono = _chrono.get()
+    return chrono["endpoint"] if chrono else "interne"
+
+
+def debut_handler():
+    """Marque l'entrée dans le handler : le temps écoulé depuis la réception = validation."""
+    chrono = _chrono.get()
+    if chrono is not None:
+        etapes.observer(time.perf_counter() - chrono["debut"], chrono["endpoint"], "validation")
+
+
+def fin_handler():
+    """Marque la sortie du handler : la suite jusqu'à l'envoi = sérialisation."""
+    chrono = _chrono.get()
+    if chrono is not None:
+        chrono["fin_handler"] = time.perf_counter()
+
+
+class Etape:
+    """Context manager qui chronomètre une étape pour l'endpoint courant."""
+
+    __slots__ = ("nom", "debut")
+
+    def __init__(self, nom):
+        self.nom = nom
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        etapes.observer(time.perf_counter() - self.debut, endpoint_courant(), self.nom)
+        return False
+
+
+class MiddlewareMetriques:
+    """Middleware ASGI : compteurs, latence totale et étape de sérialisation."""
+
+    def __init__(self, app, endpoints=None):
+        self.app = app
+        # Chemins suivis ; les autres sont regroupés sous "autre" pour borner la cardinalité
+        self.endpoints = endpoints
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        chemin = scope["path"]
+        if self.endpoints is None:
+            self.endpoints = {getattr(r, "path", None) for r in scope["app"].routes}
+        endpoint = chemin if chemin in self.endpoints else "autre"
+        chrono = {"endpoint": endpoint, "debut": time.perf_counter(), "fin_handler": None}
+        jeton = _chrono.set(chrono)
+        statut = 500
+
+        async def envoyer(message):
+            nonlocal statut
+            if message["type"] == "http.response.start":
+                statut = message["status"]
+                if chrono["fin_handler"] is not None:
+                    etapes.observer(time.perf_counter() - chrono["fin_handler"], endpoint, "serialisation")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, envoyer)
+        finally:
+            _chrono.reset(jeton)
+            latence.observer(time.perf_counter() - chrono["debut"], endpoint)
+            requetes.inc(endpoint, str(statut))
+            if statut >= 400:
+                erreurs.inc(endpoint)
@@ -0,0 +1,76 @@
+import asyncio
+import contextvars
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Regroupe les requêtes unitaires reçues dans une courte fenêtre.
+
+    Chaque appelant dépose sa ligne et attend un future ; une tâche de fond
+    vide la file toutes les `fenetre_ms` millisecondes (ou dès `taille_max`
+    lignes) et score le lot d'un seul coup avec `scorer`, dans le contexte
+    (contextvars) du premier appelant : les métriques par endpoint relevées
+    pendant le scoring restent attribuées à la requête d'origine.
+    """
+
+    def __init__(self, scorer, fenetre_ms=2.0, taille_max=256):
+        self.scorer = scorer
+        self.fenetre = fenetre_ms / 1000.0
+        self.taille_max = taille_max
+        self._file = None
+        self._tache = None
+
+    async def demarrer(self):
+        self._file = asyncio.Queue()
+        self._tache = asyncio.create_task(self._boucle())
+
+    async def arreter(self):
+        if self._tache is not None:
+            self._tache.cancel()
+            try:
+                await self._tache
+            except asyncio.CancelledError:
+                pass
+            self._tache = None
+
+    async def soumettre(self, ligne):
+        """Renvoie (prediction, probabilite, ...) pour une ligne de 11 valeurs."""
+        future = asyncio.get_running_loop().create_future()
+        self._file.put_nowait((ligne, future, contextvars.copy_context()))
+        return await future
+
+    async def _collecter(self):
+        loop = asyncio.get_running_loop()
+        lot = [await self._file.get()]
+        echeance = loop.time() + self.fenetre
+        while len(lot) < self.taille_max:
+            # Vider ce qui est déjà arrivé sans attendre
+            while len(lot) < self.taille_max and not self._file.empty():
+                lot.append(self._file.get_nowait())
+            restant = echeance - loop.time()
+            if len(lot) >= self.taille_max or restant <= 0:
+                break
+            try:
+                lot.append(await asyncio.wait_for(self._file.get(), restant))
+            except asyncio.TimeoutError:
+                break
+        return lot
+
+    async def _boucle(self):
+        while True:
+            lot = await self._collecter()
+            lot = [element for element in lot if not element[1].done()]
+            if not lot:
+                continue
+            try:
+                resultats = lot[0][2].run(self.scorer, np.array([ligne for ligne, _, _ in lot], dtype=float))
+            except Exception as e:
+                for _, future, _ in lot:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            # Un tuple par ligne : (prediction, probabilite[, ...]) selon ce que renvoie scorer
+            for (_, future, _), *valeurs in zip(lot, *resultats):
+                if not future.done():
+                    future.set_result(tuple(valeurs))
@@ -0,0 +1,145 @@
+import numpy as np
+
+
+class MoteurSklearn:
+    """Chaîne d'origine : scaler.transform puis model.predict / predict_proba."""
+
+    nom = "sklearn"
+
+    def __init__(self, model, scaler):
+        self.model = model
+        self.scaler = scaler
+
+    def scorer(self, input_data):
+        input_scaled = self.scaler.transform(input_data)
+        predictions = self.model.predict(input_scaled)
+        probabilities = self.model.predict_proba(input_scaled)[:, 1]
+        return predictions, probabilities
+
+    def expliquer(self, input_data):
+        """Comme scorer, plus les contributions au log-odds : coef_ * scaled, (n, 11)."""
+        input_scaled = self.scaler.transform(input_data)
+        contributions = input_scaled * np.ravel(self.model.coef_)
+        predictions = self.model.predict(input_scaled)
+        probabilities = self.model.predict_proba(input_scaled)[:, 1]
+        return predictions, probabilities, contributions
+
+    @property
+    def base(self):
+        return float(np.ravel(self.model.intercept_)[0])
+
+
+def replier(coef, intercept, scale, min_):
+    """Replie la transformation MinMax dans les coefficients : renvoie (poids, biais)."""
+    coef = np.asarray(coef, dtype=float).ravel()
+    poids = coef * np.asarray(scale, dtype=float)
+    biais = float(coef @ np.asarray(min_, dtype=float) + np.ravel(intercept)[0])
+    return poids, biais
+
+
+def decalages(coef, intercept, min_):
+    """Part constante de chaque contribution (coef_ * min_) et base (intercept_)."""
+    return np.ravel(coef).astype(float) * np.asarray(min_, dtype=float), float(np.ravel(intercept)[0])
+
+
+class MoteurCompile:
+    """Scaler MinMax replié dans la régression logistique.
+
+    scaled = X * scale_ + min_, donc
+    coef_ . scaled + intercept_ = X . (coef_ * scale_) + (coef_ . min_ + intercept_).
+    Un seul produit scalaire + sigmoïde donne statut et probabilité.
+    """
+
+    nom = "compile"
+
+    def __init__(self, model, scaler):
+        if getattr(scaler, "clip", False):
+            raise ValueError("MinMaxScaler(clip=True) ne peut pas être replié en transformation affine")
+        if len(model.classes_) != 2:
+            raise ValueError("Le moteur compilé ne gère que la classification binaire")
+
+        self.poids, self.biais = replier(model.coef_, model.intercept_, scaler.scale_, scaler.min_)
+        self.decalages, self.base = decalages(model.coef_, model.intercept_, scaler.min_)
+        self.classes = np.asarray(model.classes_)
+
+    @classmethod
+    def depuis_compact(cls, compact):
+        """Construit le moteur depuis l'enregistrement de modele_compact.npy."""
+        moteur = cls.__new__(cls)
+        moteur.poids, moteur.biais = replier(compact["coef"], compact["intercept"],
+                                             compact["scale"], compact["min"])
+        moteur.decalages, moteur.base = decalages(compact["coef"], compact["intercept"], compact["min"])
+        moteur.classes = np.asarray(compact["classes"])
+        return moteur
+
+    @classmethod
+    def depuis_parametres(cls, parametres, classes):
+        """Reconstruit le moteur à partir du vecteur [poids..., biais] (sans copie)."""
+        moteur = cls.__new__(cls)
+        moteur.poids = parametres[:-1]
+        moteur.biais = float(parametres[-1])
+        # Le vecteur replié ne permet plus de séparer intercept et décalages du scaler
+        moteur.decalages, moteur.base = None, None
+        moteur.classes = np.asarray(classes)
+        return moteur
+
+    def parametres(self):
+        """Vecteur [poids..., biais] à partager entre processus."""
+        return np.append(self.poids, self.biais)
+
+    def logits(self, input_data):
+        return np.asarray(input_data, dtype=float) @ self.poids + self.biais
+
+    def scorer(self, input_data):
+        z = self.logits(input_data)
+        probabilities = 1.0 / (1.0 + np.exp(-z))
+        # Même règle que LogisticRegression.predict : classe positive si z > 0
+        predictions = self.classes[(z > 0).astype(int)]
+        return predictions, probabilities
+
+    def expliquer(self, input_data):
+        """Score et contributions de chaque variable au log-odds, en une passe.
+
+        contribution_j = coef_j * scaled_j = X_j * poids_j + coef_j * min_j ;
+        base + somme des contributions = log-odds de la classe positive.
+        """
+        if self.decalages is None:
+            raise ValueError("Moteur reconstruit depuis ses paramètres repliés : explication indisponible")
+        contributions = np.asarray(input_data, dtype=float) * self.poids + self.decalages
+        z = contributions.sum(axis=1) + self.base
+        probabilities = 1.0 / (1.0 + np.exp(-z))
+        predictions = self.classes[(z > 0).astype(int)]
+        return predictions, probabilities, contributions
+
+
+def echantillon_parite(scaler, n=1000, seed=0):
+    """Tire n lignes dans le domaine vu par le scaler (data_min_ .. data_max_)."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(scaler.data_min_, scaler.data_max_, size=(n, len(scaler.data_min_)))
+
+
+def verifier_parite(moteur, reference, input_data, tolerance=1e-9):
+    """Compare deux moteurs sur la même matrice ; lève ValueError en cas d'écart."""
+    pred_moteur, proba_moteur = moteur.scorer(input_data)
+    pred_ref, proba_ref = reference.scorer(input_data)
+    ecart = float(np.max(np.abs(proba_moteur - proba_ref))) if len(input_data) else 0.0
+    if ecart > tolerance or not np.array_equal(pred_moteur, pred_ref):
+        raise ValueError(f"Parité rompue avec {reference.nom} (écart max des probabilités : {ecart:.3g})")
+    return ecart
+
+
+def construire_moteur(model, scaler, nom="compile", input_parite=None):
+    """Construit le moteur demandé au démarrage ; repli sur sklearn si la compilation échoue."""
+    reference = MoteurSklearn(model, scaler)
+    if nom == "sklearn":
+        return reference
+
+    try:
+        moteur = MoteurCompile(model, scaler)
+        if input_parite is None:
+            input_parite = echantillon_parite(scaler)
+        verifier_parite(moteur, reference, input_parite)
+    except (ValueError, AttributeError) as e:
+        print(f"⚠️ Moteur compilé indisponible ({e}), repli sur sklearn")
+        return reference
+    return moteur
@@ -0,0 +1,199 @@
+"""Registre local des versions de modèle.
+
+Chaque version est un dossier registre/<version>/ contenant le scaler et le
+modèle (pickles + format compact), leurs sommes de contrôle et un
+metadata.json. Le fichier registre/ACTIF désigne la version servie.
+
+    python Api/registre.py enregistrer --activer    # artefacts courants d'Api/
+    python Api/registre.py lister
+    python Api/registre.py activer v20261018-120000
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from artefacts import (
+    DOSSIER, charger_artefacts, charger_compact, ecrire_sommes, empreinte_artefacts, exporter_compact,
+)
+from moteurs import MoteurCompile, construire_moteur
+
+REGISTRE_PATH = os.getenv("REGISTRE_MODELES", os.path.join(DOSSIER, "registre"))
+MODEL_NOM = "modele_logistic_regression.pkl"
+SCALER_NOM = "scaler_minmax.pkl"
+COMPACT_NOM = "modele_compact.npy"
+SOMMES_NOM = "artefacts.sha256"
+
+
+class ModeleCharge:
+    """Moteur préchauffé et ses métadonnées, remplacé d'un bloc lors d'un rechargement."""
+
+    def __init__(self, moteur, version, domaine_min, domaine_max, model=None, scaler=None,
+                 durees_ms=None, metadata=None):
+        self.moteur = moteur
+        self.version = version
+        self.domaine_min = domaine_min
+        self.domaine_max = domaine_max
+        self.model = model
+        self.scaler = scaler
+        self.durees_ms = durees_ms or {}
+        self.metadata = metadata or {}
+
+
+def charger_modele(dossier=DOSSIER, version=None, moteur_nom="compile", format_artefacts="compact"):
+    """Charge, vérifie et préchauffe les artefacts d'un dossier.
+
+    Format compact (memory-map, sans pickle) si possible, sinon les pickles.
+    Sans version explicite, l'empreinte des pickles (modèle + scaler) sert de
+    version, quel que soit le format chargé.
+    """
+    compact_path = os.path.join(dossier, COMPACT_NOM)
+    sommes_path = os.path.join(dossier, SOMMES_NOM)
+    model_path, scaler_path = os.path.join(dossier, MODEL_NOM), os.path.join(dossier, SCALER_NOM)
+    durees = {}
+
+    debut = time.perf_counter()
+    model = scaler = None
+    if format_artefacts == "compact" and moteur_nom == "compile" and os.path.exists(compact_path):
+        compact = charger_compact(compact_path, sommes_path, (model_path, scaler_path))
+        domaine_min, domaine_max = np.array(compact["data_min"]), np.array(compact["data_max"])
+        durees["chargement"] = (time.perf_counter() - debut) * 1000
+        # Empreinte des pickles d'origine : même version qu'avec ARTEFACTS_FORMAT=pickle
+        version = version or compact["source"].item().decode()
+
+        debut = time.perf_counter()
+        moteur = MoteurCompile.depuis_compact(compact)
+    else:
+        model, scaler = charger_artefacts(model_path, scaler_path, sommes_path)
+        domaine_min, domaine_max = scaler.data_min_, scaler.data_max_
+        durees["chargement"] = (time.perf_counter() - debut) * 1000
+        version = version or empreinte_artefacts(model_path, scaler_path)
+
+        debut = time.perf_counter()
+        moteur = construire_moteur(model, scaler, moteur_nom)
+    durees["moteur"] = (time.perf_counter() - debut) * 1000
+
+    # Préchauffage avant toute mise en service
+    debut = time.perf_counter()
+    moteur.scorer(np.vstack([domaine_min, domaine_max]))
+    durees["prechauffage"] = (time.perf_counter() - debut) * 1000
+
+    metadata_path = os.path.join(dossier, "metadata.json")
+    metadata = {}
+    if os.path.exists(metadata_path):
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+
+    return ModeleCharge(moteur, version, domaine_min, domaine_max, model, scaler,
+                        {k: round(v, 2) for k, v in durees.items()}, metadata)
+
+
+def dossier_version(version, registre=REGISTRE_PATH):
+    return os.path.join(registre, version)
+
+
+def lister_versions(registre=REGISTRE_PATH):
+    """Métadonnées de toutes les versions, de la plus ancienne à la plus récente."""
+    if not os.path.isdir(registre):
+        return []
+    versions = []
+    for nom in sorted(os.listdir(registre)):
+        metadata_path = os.path.join(registre, nom, "metadata.json")
+        if os.path.isfile(metadata_path):
+            with open(metadata_path) as f:
+                versions.append(json.load(f))
+    return versions
+
+
+def version_connue(version, registre=REGISTRE_PATH):
+    """Vrai si `version` figure dans le registre (et n'est pas un chemin quelconque)."""
+    return version in {metadata["version"] for metadata in lister_versions(registre)}
+
+
+def version_active(registre=REGISTRE_PATH):
+    chemin = os.path.join(registre, "ACTIF")
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin) as f:
+        return f.read().strip() or None
+
+
+def activer(version, registre=REGISTRE_PATH):
+    """Désigne la version servie ; écriture atomique du pointeur ACTIF."""
+    if not version_connue(version, registre):
+        raise ValueError(f"Version inconnue : {version}")
+    descripteur, temporaire = tempfile.mkstemp(dir=registre)
+    with os.fdopen(descripteur, "w") as f:
+        f.write(version + "\n")
+    os.replace(temporaire, os.path.join(registre, "ACTIF"))
+
+
+def enregistrer(model, scaler, version=None, metriques=None, source=None, registre=REGISTRE_PATH):
+    """Ajoute une paire scaler + modèle au registre et renvoie sa version."""
+    import joblib
+
+    version = version or time.strftime("v%Y%m%d-%H%M%S")
+    dossier = dossier_version(version, registre)
+    if os.path.exists(dossier):
+        raise ValueError(f"La version {version} existe déjà")
+
+    # Écriture dans un dossier temporaire puis renommage : pas de version à moitié écrite
+    os.makedirs(registre, exist_ok=True)
+    temporaire = tempfile.mkdtemp(dir=registre, prefix=".tmp-")
+    try:
+        chemins = [os.path.join(temporaire, nom) for nom in (MODEL_NOM, SCALER_NOM, COMPACT_NOM)]
+        joblib.dump(model, chemins[0])
+        joblib.dump(scaler, chemins[1])
+        exporter_compact(model, scaler, chemins[2], chemins[:2])
+        ecrire_sommes(chemins, os.path.join(temporaire, SOMMES_NOM))
+        metadata = {
+            "version": version,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "source": source,
+            "empreinte": empreinte_artefacts(chemins[0], chemins[1]),
+            "modele": type(model).__name__,
+            "parametres": {k: v for k, v in model.get_params().items()
+                           if isinstance(v, (str, int, float, bool, type(None)))},
+            "metriques": metriques or {},
+        }
+        with open(os.path.join(temporaire, "metadata.json"), "w") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        os.replace(temporaire, dossier)
+    except BaseException:
+        shutil.rmtree(temporaire, ignore_errors=True)
+        raise
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    p_enregistrer = commandes.add_parser("enregistrer", help="Enregistrer les artefacts d'Api/ comme nouvelle version")
+    p_enregistrer.add_argument("--version")
+    p_enregistrer.add_argument("--activer", action="store_true")
+    commandes.add_parser("lister")
+    p_activer = commandes.add_parser("activer")
+    p_activer.add_argument("version")
+    args = parser.parse_args(argv)
+
+    if args.commande == "enregistrer":
+        version = enregistrer(*charger_artefacts(), version=args.version, source="Api/")
+        if args.activer:
+            activer(version)
+        print(f"✅ Version {version} enregistrée{' et activée' if args.activer else ''}")
+    elif args.commande == "lister":
+        active = version_active()
+        for metadata in lister_versions():
+            marque = "*" if metadata["version"] == active else " "
+            print(f"{marque} {metadata['version']}  {metadata['date']}  {metadata.get('metriques', {})}")
+    else:
+        activer(args.version)
+        print(f"✅ Version {args.version} activée (kill -HUP <pid> ou POST /admin/recharger pour l'appliquer)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Scoring en masse d'un fichier CSV ou Parquet, par blocs.
+
+Exemples :
+    python Api/score_csv.py data/test.csv -o predictions.csv --probabilites
+    python Api/score_csv.py portefeuille.csv -o predictions.csv --workers 8
+"""
+import argparse
+import io
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from artefacts import COMPACT_PATH, charger_artefacts, charger_compact
+from encodage import FEATURES, encoder, lignes_valides
+from moteurs import MoteurCompile, construire_moteur
+
+
+def lire_blocs(chemin, taille_bloc):
+    """Itère sur le fichier par blocs de `taille_bloc` lignes."""
+    if chemin.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("❌ pyarrow est requis pour lire un fichier Parquet")
+        for batch in pq.ParquetFile(chemin).iter_batches(batch_size=taille_bloc):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(chemin, chunksize=taille_bloc)
+
+
+def lire_blocs_bruts(chemin, taille_bloc):
+    """Découpe le fichier sans le parser : le parsing est fait par les workers.
+
+    CSV : (entête, lignes brutes) ; suppose des champs sans retour à la ligne
+    (cas des fichiers Kaggle). Parquet : (chemin, index du row group).
+    """
+    if chemin.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for i in range(pq.ParquetFile(chemin).num_row_groups):
+            yield ("parquet", chemin, i)
+        return
+    with open(chemin, "r", newline="") as f:
+        entete = f.readline()
+        while True:
+            lignes = list(itertools.islice(f, taille_bloc))
+            if not lignes:
+                return
+            yield ("csv", entete, lignes)
+
+
+# État propre à chaque worker, initialisé une seule fois par processus
+_moteur_worker = None
+_memoire_worker = None
+_imputer_worker = True
+
+
+def _init_worker(nom_memoire, n_parametres, classes, nom_moteur, imputer):
+    global _moteur_worker, _memoire_worker, _imputer_worker
+    _imputer_worker = imputer
+    if nom_memoire is not None:
+        # Coefficients lus directement dans la mémoire partagée, sans copie ni pickle
+        _memoire_worker = shared_memory.SharedMemory(name=nom_memoire)
+        parametres = np.ndarray((n_parametres,), dtype=np.float64, buffer=_memoire_worker.buf)
+        _moteur_worker = MoteurCompile.depuis_parametres(parametres, classes)
+    else:
+        _moteur_worker = construire_moteur(*charger_artefacts(), nom_moteur)
+
+
+def _scorer_tache(tache):
+    if tache[0] == "parquet":
+        import pyarrow.parquet as pq
+        bloc = pq.ParquetFile(tache[1]).read_row_group(tache[2]).to_pandas()
+    else:
+        bloc = pd.read_csv(io.StringIO(tache[1] + "".join(tache[2])))
+    return (*scorer_bloc(_moteur_worker, bloc, imputer=_imputer_worker), len(bloc))
+
+
+def scorer_parallele(moteur, chemin, taille_bloc, workers, imputer=True):
+    """Répartit les blocs sur un pool de processus ; les résultats sortent dans l'ordre.
+
+    Au plus 2 blocs par worker sont en vol, la mémoire reste donc bornée.
+    """
+    memoire = None
+    if isinstance(moteur, MoteurCompile):
+        parametres = moteur.parametres()
+        memoire = shared_memory.SharedMemory(create=True, size=parametres.nbytes)
+        np.ndarray(parametres.shape, dtype=np.float64, buffer=memoire.buf)[:] = parametres
+        init_args = (memoire.name, len(parametres), moteur.classes, moteur.nom, imputer)
+    else:
+        init_args = (None, 0, None, moteur.nom, imputer)
+
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+            en_vol = deque()
+            for tache in lire_blocs_bruts(chemin, taille_bloc):
+                en_vol.append(pool.submit(_scorer_tache, tache))
+                if len(en_vol) >= 2 * workers:
+                    yield en_vol.popleft().result()
+            while en_vol:
+                yield en_vol.popleft().result()
+    finally:
+        if memoire is not None:
+            memoire.close()
+            memoire.unlink()
+
+
+def scorer_sequentiel(moteur, chemin, taille_bloc, imputer=True):
+    for bloc in lire_blocs(chemin, taille_bloc):
+        yield (*scorer_bloc(moteur, bloc, imputer=imputer), len(bloc))
+
+
+def scorer_bloc(moteur, bloc, id_col="Loan_ID", imputer=True):
+    """Score un bloc ; les lignes invalides reçoivent un statut vide."""
+    manquantes = [f for f in FEATURES if f not in bloc.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes : {manquantes}")
+
+    X = encoder(bloc, imputer=imputer)
+    valides = lignes_valides(X)
+
+    statuts = np.full(len(bloc), "", dtype=object)
+    probabilites = np.full(len(bloc), np.nan)
+    if valides.any():
+        predictions, probas = moteur.scorer(X[valides])
+        statuts[valides] = np.where(predictions == 1, "Y", "N")
+        probabilites[valides] = probas
+
+    resultat = pd.DataFrame({id_col: bloc[id_col].to_numpy() if id_col in bloc else np.arange(len(bloc))})
+    resultat["Loan_Status"] = statuts
+    return resultat, probabilites, int((~valides).sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring en masse d'un fichier CSV/Parquet")
+    parser.add_argument("entree", help="Fichier CSV ou Parquet au format data/test.csv")
+    parser.add_argument("-o", "--sortie", default="predictions.csv", help="Fichier CSV de sortie")
+    parser.add_argument("--taille-bloc", type=int, default=50000, help="Nombre de lignes par bloc")
+    parser.add_argument("--probabilites", action="store_true", help="Ajouter la colonne de probabilité")
+    parser.add_argument("--sans-imputation", dest="imputer", action="store_false",
+                        help="Écarter les lignes incomplètes au lieu d'imputer (encodage.IMPUTATION)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus (0 = tous les cœurs)")
+    parser.add_argument("--moteur", default=os.getenv("MOTEUR_SCORING", "compile"), choices=["compile", "sklearn"])
+    args = parser.parse_args(argv)
+
+    if args.moteur == "compile" and os.path.exists(COMPACT_PATH):
+        moteur = MoteurCompile.depuis_compact(charger_compact())
+    else:
+        moteur = construire_moteur(*charger_artefacts(), args.moteur)
+
+    workers = args.workers or os.cpu_count()
+    if workers > 1:
+        blocs = scorer_parallele(moteur, args.entree, args.taille_bloc, workers, args.imputer)
+    else:
+        blocs = scorer_sequentiel(moteur, args.entree, args.taille_bloc, args.imputer)
+
+    debut = time.perf_counter()
+    total, invalides = 0, 0
+    with open(args.sortie, "w", newline="") as sortie:
+        try:
+            for i, (resultat, probabilites, n_invalides, n_lignes) in enumerate(blocs):
+                if args.probabilites:
+                    resultat["Probabilite"] = np.round(probabilites, 4)
+                resultat.to_csv(sortie, header=(i == 0), index=False)
+
+                total += n_lignes
+                invalides += n_invalides
+        except ValueError as e:
+            sys.exit(f"❌ {e}")
+
+    duree = time.perf_counter() - debut
+    debit = total / duree if duree > 0 else float("inf")
+    print(f"✅ {total} lignes scorées en {duree:.2f}s ({debit:,.0f} lignes/s, {workers} processus), "
+          f"{invalides} invalides → {args.sortie}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Scoring fantôme (champion / challenger) hors du chemin critique des requêtes.
+
+Les lignes scorées par le modèle servi (champion) sont déposées, avec ses
+résultats, dans une file bornée ; un thread de fond les score par lots avec
+le challenger et agrège désaccords et écarts de probabilité. Quand la file
+est pleine, les lignes sont abandonnées (et comptées) plutôt que de ralentir
+les requêtes.
+
+Chaque process sauvegarde ses agrégats dans son propre fichier
+(<stats_path sans .json>-<pid>.json), repris à son redémarrage ; les
+statistiques exposées additionnent les fichiers de tous les process.
+"""
+import glob
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Histogramme des écarts p_challenger - p_champion sur [-1, 1]
+BORNES_DELTA = np.linspace(-1.0, 1.0, 41)
+
+
+class Agregat:
+    """Statistiques cumulées pour un couple (champion, challenger)."""
+
+    def __init__(self):
+        self.lignes = 0
+        self.desaccords = 0
+        self.somme_delta = 0.0
+        self.somme_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.histogramme = np.zeros(len(BORNES_DELTA) - 1, dtype=np.int64)
+
+    def ajouter(self, predictions, probabilities, predictions_c, probabilities_c):
+        delta = probabilities_c - probabilities
+        abs_delta = np.abs(delta)
+        self.lignes += len(delta)
+        self.desaccords += int(np.count_nonzero(predictions_c != predictions))
+        self.somme_delta += float(delta.sum())
+        self.somme_abs_delta += float(abs_delta.sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+        self.histogramme += np.histogram(delta, BORNES_DELTA)[0]
+
+    def fusionner(self, autre):
+        self.lignes += autre.lignes
+        self.desaccords += autre.desaccords
+        self.somme_delta += autre.somme_delta
+        self.somme_abs_delta += autre.somme_abs_delta
+        self.max_abs_delta = max(self.max_abs_delta, autre.max_abs_delta)
+        self.histogramme += autre.histogramme
+        return self
+
+    def etat(self):
+        """Sommes brutes (sans arrondi), pour la sauvegarde et la fusion."""
+        return {"lignes": self.lignes, "desaccords": self.desaccords, "somme_delta": self.somme_delta,
+                "somme_abs_delta": self.somme_abs_delta, "max_abs_delta": self.max_abs_delta,
+                "histogramme": self.histogramme.tolist()}
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        agregat = cls()
+        for nom in ("lignes", "desaccords", "somme_delta", "somme_abs_delta", "max_abs_delta"):
+            setattr(agregat, nom, etat[nom])
+        agregat.histogramme = np.asarray(etat["histogramme"], dtype=np.int64)
+        return agregat
+
+    def resume(self):
+        n = max(self.lignes, 1)
+        return {
+            "lignes": self.lignes,
+            "desaccords": self.desaccords,
+            "taux_desaccord": round(self.desaccords / n, 6),
+            "delta_moyen": round(self.somme_delta / n, 6),
+            "delta_abs_moyen": round(self.somme_abs_delta / n, 6),
+            "delta_abs_max": round(self.max_abs_delta, 6),
+            "histogramme_delta": {"bornes": BORNES_DELTA.round(2).tolist(),
+                                  "comptes": self.histogramme.tolist()},
+        }
+
+
+class Shadow:
+    """Score en arrière-plan avec un challenger (registre.ModeleCharge).
+
+    `taux` : fraction des lignes échantillonnées (1.0 = toutes) ;
+    `taille_file` : nombre maximal d'appels en attente avant abandon ;
+    `stats_path` : base des fichiers JSON où les agrégats de chaque process
+    sont sauvegardés toutes les `intervalle` secondes (None = en mémoire
+    seulement).
+
+    Le thread attend `fenetre_ms` après le premier appel reçu pour scorer un
+    lot plus gros : moins de réveils, donc moins de concurrence pour le GIL
+    avec les requêtes.
+    """
+
+    def __init__(self, challenger, taux=1.0, taille_file=1000, taille_lot=1024,
+                 stats_path=None, intervalle=10.0, fenetre_ms=50.0):
+        self.challenger = challenger
+        self.taux = taux
+        self.taille_lot = taille_lot
+        self.fenetre = fenetre_ms / 1000.0
+        self.stats_path = stats_path
+        self.intervalle = intervalle
+        self.soumises = 0
+        self.rejetees = 0
+        self.erreurs = 0
+        self.agregats = {}
+        self._fichier = None
+        if stats_path:
+            # Même pid qu'un démarrage précédent (pid 1 en conteneur) : on reprend ses agrégats
+            self._fichier = f"{os.path.splitext(stats_path)[0]}-{os.getpid()}.json"
+            self.agregats = _lire_agregats(self._fichier)
+        self._file = queue.Queue(maxsize=taille_file)
+        self._rng = np.random.default_rng()
+        self._verrou = threading.Lock()
+        self._thread = None
+
+    def demarrer(self):
+        self._thread = threading.Thread(target=self._boucle, name="shadow", daemon=True)
+        self._thread.start()
+
+    def arreter(self):
+        if self._thread is not None:
+            self._file.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.sauvegarder()
+
+    def soumettre(self, input_data, predictions, probabilities, version):
+        """Dépose un lot déjà scoré par le champion ; ne bloque jamais."""
+        if self.taux < 1.0:
+            masque = self._rng.random(len(input_data)) < self.taux
+            if not masque.any():
+                return
+            input_data, predictions, probabilities = input_data[masque], predictions[masque], probabilities[masque]
+        try:
+            self._file.put_nowait((input_data, predictions, probabilities, version))
+            soumise = True
+        except queue.Full:
+            soumise = False
+        with self._verrou:
+            if soumise:
+                self.soumises += len(input_data)
+            else:
+                self.rejetees += len(input_data)
+
+    def _boucle(self):
+        prochaine_sauvegarde = time.monotonic() + self.intervalle
+        while True:
+            try:
+                element = self._file.get(timeout=self.intervalle)
+            except queue.Empty:
+                element = ()
+            if element:
+                time.sleep(self.fenetre)
+            # Regroupe ce qui attend déjà dans la file : un seul passage du challenger
+            elements = [element] if element else []
+            lignes = len(element[0]) if element else 0
+            arret = element is None
+            while not arret and lignes < self.taille_lot:
+                try:
+                    element = self._file.get_nowait()
+                except queue.Empty:
+                    break
+                if element is None:
+                    arret = True
+                else:
+                    elements.append(element)
+                    lignes += len(element[0])
+
+            if elements:
+                self._traiter(elements)
+            if time.monotonic() >= prochaine_sauvegarde:
+                self.sauvegarder()
+                prochaine_sauvegarde = time.monotonic() + self.intervalle
+            if arret:
+                return
+
+    def _traiter(self, elements):
+        challenger = self.challenger
+        try:
+            predictions_c, probabilities_c = challenger.moteur.scorer(
+                np.vstack([e[0] for e in elements]))
+        except Exception:
+            self.erreurs += 1
+            return
+
+        debut = 0
+        with self._verrou:
+            for input_data, predictions, probabilities, version in elements:
+                fin = debut + len(input_data)
+                cle = (version, challenger.version)
+                agregat = self.agregats.get(cle)
+                if agregat is None:
+                    agregat = self.agregats[cle] = Agregat()
+                agregat.ajouter(np.asarray(predictions), np.asarray(probabilities),
+                                predictions_c[debut:fin], probabilities_c[debut:fin])
+                debut = fin
+
+    def _fichiers(self):
+        racine = os.path.splitext(self.stats_path)[0]
+        return glob.glob(glob.escape(racine) + "-*.json")
+
+    def stats(self, cumuler=True):
+        """Compteurs de ce process ; paires cumulées sur les fichiers de tous les
+        process (autres workers, démarrages précédents) si `cumuler`."""
+        agregats = {}
+        if cumuler and self.stats_path:
+            for chemin in self._fichiers():
+                if chemin != self._fichier:
+                    for cle, agregat in _lire_agregats(chemin).items():
+                        agregats.setdefault(cle, Agregat()).fusionner(agregat)
+        with self._verrou:
+            for cle, agregat in self.agregats.items():
+                agregats.setdefault(cle, Agregat()).fusionner(agregat)
+        paires = [{"champion": champion, "challenger": challenger, **agregat.resume()}
+                  for (champion, challenger), agregat in agregats.items()]
+        return {
+            "challenger": self.challenger.version,
+            "taux": self.taux,
+            "soumises": self.soumises,
+            "rejetees": self.rejetees,
+            "en_attente": self._file.qsize(),
+            "erreurs": self.erreurs,
+            "paires": paires,
+        }
+
+    def sauvegarder(self):
+        """Écriture atomique des agrégats de ce process dans son fichier."""
+        if not self._fichier:
+            return
+        with self._verrou:
+            agregats = [{"champion": champion, "challenger": challenger, **agregat.etat()}
+                        for (champion, challenger), agregat in self.agregats.items()]
+        dossier = os.path.dirname(os.path.abspath(self._fichier))
+        descripteur, temporaire = tempfile.mkstemp(dir=dossier, suffix=".tmp")
+        with os.fdopen(descripteur, "w") as f:
+            json.dump({"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "pid": os.getpid(),
+                       "agregats": agregats}, f, ensure_ascii=False)
+        os.replace(temporaire, self._fichier)
+
+
+def _lire_agregats(chemin):
+    """{(champion, challenger): Agregat} d'un fichier sauvegardé ; vide s'il est absent ou illisible."""
+    try:
+        with open(chemin) as f:
+            contenu = json.load(f)
+        return {(e["champion"], e["challenger"]): Agregat.depuis_etat(e) for e in contenu["agregats"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
@@ -0,0 +1,73 @@
+"""Micro-benchmarks du chemin d'inférence (scaler + régression logistique).
+
+Compare le moteur sklearn et le moteur compilé, ligne seule et par lots,
+et écrit les résultats en JSON pour comparaison entre commits.
+
+    python benchmarks/bench_inference.py -o bench_inference.json
+"""
+import argparse
+import os
+import sys
+import timeit
+import warnings
+
+import numpy as np
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RACINE, "Api"))
+
+from artefacts import charger_artefacts  # noqa: E402
+from encodage import encoder, lignes_valides  # noqa: E402
+from moteurs import MoteurCompile, MoteurSklearn  # noqa: E402
+from rapport import contexte, ecrire_rapport  # noqa: E402
+
+TAILLES = (1, 10, 100, 1000, 10000)
+
+
+def matrice_test(n):
+    """Lignes valides de data/test.csv, répétées jusqu'à n lignes."""
+    import pandas as pd
+
+    X = encoder(pd.read_csv(os.path.join(RACINE, "data", "test.csv")))
+    X = X[lignes_valides(X)]
+    return np.resize(X, (n, X.shape[1]))
+
+
+def mesurer(fonction, duree_min=0.2):
+    """Renvoie la meilleure durée d'un appel (s), sur plusieurs répétitions."""
+    timer = timeit.Timer(fonction)
+    nombre, _ = timer.autorange()
+    nombre = max(1, int(nombre * duree_min / 0.2))
+    return min(timer.repeat(repeat=5, number=nombre)) / nombre
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--sortie", default="bench_inference.json")
+    parser.add_argument("--tailles", type=int, nargs="+", default=list(TAILLES))
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    model, scaler = charger_artefacts()
+    moteurs = [MoteurSklearn(model, scaler), MoteurCompile(model, scaler)]
+    X = matrice_test(max(args.tailles))
+
+    resultats = []
+    for taille in args.tailles:
+        lot = X[:taille]
+        for moteur in moteurs:
+            duree = mesurer(lambda: moteur.scorer(lot))
+            resultats.append({
+                "moteur": moteur.nom,
+                "taille_lot": taille,
+                "us_par_appel": round(duree * 1e6, 3),
+                "us_par_ligne": round(duree * 1e6 / taille, 4),
+                "lignes_par_s": round(taille / duree),
+            })
+            print(f"{moteur.nom:8s} lot={taille:6d}  {duree * 1e6:10.1f} µs/appel  {taille / duree:14,.0f} lignes/s")
+
+    ecrire_rapport(args.sortie, {**contexte(), "type": "inference", "resultats": resultats})
+
+
+if __name__ == "__main__":
+    main()
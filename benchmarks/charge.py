@@ -0,0 +1,187 @@
+"""Générateur de charge de bout en bout pour l'API de scoring.
+
+Démarre (sauf --url) une instance uvicorn locale, rejoue des payloads issus
+de data/test.csv ou d'un fichier JSONL (un payload ClientData par ligne) à
+concurrence contrôlée, puis écrit RPS et latences p50/p95/p99 en JSON.
+
+    python benchmarks/charge.py --concurrence 16 --duree 20 -o bench_charge.json
+    python benchmarks/charge.py --endpoint /predict/batch --taille-lot 500
+    MICRO_BATCH=1 python benchmarks/charge.py --concurrence 64
+    SHADOW_VERSION=<version> python benchmarks/charge.py   # surcoût du scoring fantôme
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RACINE, "Api"))
+
+import format_binaire  # noqa: E402
+from encodage import FEATURES, encoder, lignes_valides  # noqa: E402
+from rapport import contexte, ecrire_rapport  # noqa: E402
+
+
+def payloads_test_csv():
+    import pandas as pd
+
+    X = encoder(pd.read_csv(os.path.join(RACINE, "data", "test.csv")))
+    X = X[lignes_valides(X)]
+    return [dict(zip(FEATURES, ligne)) for ligne in X.tolist()]
+
+
+def payloads_jsonl(chemin):
+    with open(chemin) as f:
+        return [json.loads(ligne) for ligne in f if ligne.strip()]
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def demarrer_serveur(port, workers, cache):
+    env = dict(os.environ)
+    if not cache:
+        env["CACHE_TAILLE"] = "0"
+    commande = [sys.executable, "-m", "uvicorn", "api_scoring:app", "--app-dir", os.path.join(RACINE, "Api"),
+                "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    serveur = subprocess.Popen(commande, env=env)
+    url = f"http://127.0.0.1:{port}"
+    echeance = time.monotonic() + 60
+    while time.monotonic() < echeance:
+        try:
+            connexion = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connexion.request("GET", "/ready")
+            if connexion.getresponse().status == 200:
+                return serveur, url
+        except OSError:
+            pass
+        if serveur.poll() is not None:
+            sys.exit("❌ Le serveur uvicorn s'est arrêté au démarrage")
+        time.sleep(0.1)
+    serveur.terminate()
+    sys.exit("❌ Le serveur n'est pas prêt après 60 s")
+
+
+def corps_requetes(payloads, endpoint, taille_lot, binaire=False):
+    """Pré-sérialise les corps pour ne mesurer que le serveur."""
+    if endpoint == "/predict":
+        return [json.dumps(p).encode() for p in payloads]
+    lots = [payloads[i:i + taille_lot] for i in range(0, len(payloads), taille_lot)]
+    if len(lots[-1]) < taille_lot and len(lots) > 1:
+        lots.pop()
+    if binaire:
+        return [format_binaire.empaqueter(np.array([[p[f] for f in FEATURES] for p in lot])) for lot in lots]
+    return [json.dumps(lot).encode() for lot in lots]
+
+
+def travailleur(url, endpoint, corps, indice, arret, latences, erreurs, content_type):
+    cible = urlparse(url)
+    connexion = http.client.HTTPConnection(cible.hostname, cible.port, timeout=30)
+    entetes = {"Content-Type": content_type}
+    i = indice
+    while not arret.is_set():
+        debut = time.perf_counter()
+        try:
+            connexion.request("POST", endpoint, body=corps[i % len(corps)], headers=entetes)
+            reponse = connexion.getresponse()
+            reponse.read()
+            ok = reponse.status == 200
+        except (OSError, http.client.HTTPException):
+            connexion.close()
+            connexion = http.client.HTTPConnection(cible.hostname, cible.port, timeout=30)
+            ok = False
+        latences.append(time.perf_counter() - debut)
+        if not ok:
+            erreurs.append(1)
+        i += 1
+    connexion.close()
+
+
+def lancer(url, endpoint, corps, concurrence, duree, content_type="application/json"):
+    arret = threading.Event()
+    latences, erreurs = [], []
+    threads = [threading.Thread(target=travailleur,
+                                args=(url, endpoint, corps, k, arret, latences, erreurs, content_type))
+               for k in range(concurrence)]
+    debut = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duree)
+    arret.set()
+    for t in threads:
+        t.join()
+    return latences, len(erreurs), time.perf_counter() - debut
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="API déjà démarrée (sinon une instance uvicorn locale est lancée)")
+    parser.add_argument("--endpoint", default="/predict", choices=["/predict", "/predict/batch"])
+    parser.add_argument("--payloads", help="Fichier JSONL de payloads ClientData (défaut : data/test.csv)")
+    parser.add_argument("--taille-lot", type=int, default=100, help="Lignes par requête pour /predict/batch")
+    parser.add_argument("--binaire", action="store_true",
+                        help="Corps binaires (format_binaire) pour /predict/batch")
+    parser.add_argument("--concurrence", type=int, default=8)
+    parser.add_argument("--duree", type=float, default=10.0, help="Durée de la mesure (s)")
+    parser.add_argument("--prechauffage", type=float, default=2.0, help="Durée du préchauffage (s)")
+    parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn du serveur local")
+    parser.add_argument("--cache", action="store_true", help="Laisser le cache de prédictions actif")
+    parser.add_argument("-o", "--sortie", default="bench_charge.json")
+    args = parser.parse_args(argv)
+
+    payloads = payloads_jsonl(args.payloads) if args.payloads else payloads_test_csv()
+    binaire = args.binaire and args.endpoint == "/predict/batch"
+    corps = corps_requetes(payloads, args.endpoint, args.taille_lot, binaire)
+    content_type = format_binaire.CONTENT_TYPE if binaire else "application/json"
+
+    serveur = None
+    url = args.url
+    if url is None:
+        serveur, url = demarrer_serveur(port_libre(), args.workers, args.cache)
+    try:
+        if args.prechauffage > 0:
+            lancer(url, args.endpoint, corps, args.concurrence, args.prechauffage, content_type)
+        latences, erreurs, duree = lancer(url, args.endpoint, corps, args.concurrence, args.duree, content_type)
+    finally:
+        if serveur is not None:
+            serveur.terminate()
+            serveur.wait()
+
+    latences_ms = np.array(latences) * 1000
+    lignes_par_requete = 1 if args.endpoint == "/predict" else args.taille_lot
+    resultat = {
+        "requetes": len(latences),
+        "erreurs": erreurs,
+        "rps": round(len(latences) / duree, 1),
+        "lignes_par_s": round(len(latences) * lignes_par_requete / duree, 1),
+        "latence_ms": {
+            "p50": round(float(np.percentile(latences_ms, 50)), 3),
+            "p95": round(float(np.percentile(latences_ms, 95)), 3),
+            "p99": round(float(np.percentile(latences_ms, 99)), 3),
+            "max": round(float(latences_ms.max()), 3),
+        },
+    }
+    print(f"{args.endpoint} concurrence={args.concurrence} : {resultat['rps']:,.0f} req/s, "
+          f"p50={resultat['latence_ms']['p50']} ms, p95={resultat['latence_ms']['p95']} ms, "
+          f"p99={resultat['latence_ms']['p99']} ms, {erreurs} erreurs")
+
+    configuration = {k: v for k, v in vars(args).items() if k != "sortie"}
+    configuration.update({k: os.environ[k] for k in ("MOTEUR_SCORING", "MICRO_BATCH", "ARTEFACTS_FORMAT")
+                          if k in os.environ})
+    ecrire_rapport(args.sortie, {**contexte(), "type": "charge", "configuration": configuration,
+                                 "resultats": resultat})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import json
+import os
+import platform
+import subprocess
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def contexte():
+    """Commit, date et machine, pour comparer des résultats entre commits."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RACINE,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": platform.machine(),
+        "processeur": platform.processor() or None,
+        "coeurs": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def ecrire_rapport(chemin, rapport):
+    with open(chemin, "w") as f:
+        json.dump(rapport, f, indent=2, ensure_ascii=False)
+    print(f"📄 Résultats écrits dans {chemin}")
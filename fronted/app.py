@@ -1,42 +1,27 @@
 import streamlit as st
-import requests
 import pandas as pd
 import json
 from streamlit_lottie import st_lottie
 import plotly.graph_objects as go
 import matplotlib.pyplot as plt
 import seaborn as sns
-import base64  
 import random
-import math
 import plotly.express as px
 
+import assets
+import client_api
+import donnees
 
-st.set_page_config(page_title="Scoring Crédit", layout="wide", page_icon="📊")
 
-def get_base64(file_path):
-    with open(file_path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
+st.set_page_config(page_title="Scoring Crédit", layout="wide", page_icon="📊")
 
 def set_background(image_path):
-    bin_str = get_base64(image_path)
-    st.markdown(
-        f"""
-        <style>
-        .stApp {{
-            background-image: url("data:image1/jpg;base64,{bin_str}");
-            background-size: cover;
-            background-position: center;
-            background-repeat: no-repeat;
-            backdrop-filter: blur(4px);
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    # CSS mémoïsé ; l'image est redimensionnée/recompressée une seule fois (voir assets.py)
+    st.markdown(assets.css_fond(image_path), unsafe_allow_html=True)
 
 set_background("fronted/image7.jpg")
 
+@st.cache_data
 def load_lottiefile(filepath: str):
     with open(filepath, "r") as f:
         return json.load(f)
@@ -45,7 +30,7 @@ def load_lottiefile(filepath: str):
 with st.container():
     col_icon, col_title = st.columns([1, 10])
     with col_icon:
-        st.image("fronted/icons8-combo-chart-50.png", width=60)  # Icône en noir élégant
+        st.image(assets.preparer_image("fronted/icons8-combo-chart-50.png")["octets"], width=60)  # Icône en noir élégant
     with col_title:
         st.markdown("""
             <style>
@@ -82,6 +67,30 @@ df = load_data()
 # Seuil fixé à 10% 
 SEUIL = 10
 
+
+def afficher_facteurs(explication):
+    """Contributions de chaque variable au score, telles que renvoyées par /explain."""
+    contributions = sorted(explication["Contributions"].items(), key=lambda kv: abs(kv[1]))
+    fig = go.Figure(go.Bar(
+        x=[valeur for _, valeur in contributions],
+        y=[variable for variable, _ in contributions],
+        orientation="h",
+        marker_color=["#e74c3c" if valeur > 0 else "#27ae60" for _, valeur in contributions],
+    ))
+    fig.update_layout(
+        height=400,
+        margin=dict(t=30, b=0, l=0, r=0),
+        xaxis_title="Contribution au score (log-odds)",
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    facteurs = ", ".join(f"{f['variable']} ({f['contribution']:+.2f})" for f in explication["Principaux facteurs"])
+    if facteurs:
+        st.caption(f"Principaux facteurs : {facteurs}. En rouge, les variables qui augmentent "
+                   f"la probabilité affichée ; en vert, celles qui la diminuent.")
+
 # Tabs
 tab1, tab2 = st.tabs([ "🔍 Infos Client" , "📈 Nouveau Client"])
 # -- L'onglet 1
@@ -95,15 +104,12 @@ with tab1:
 
     try:
         
-        df_test = pd.read_csv("data/test.csv").head(100)
-        id_col = [col for col in df_test.columns if "id" in col.lower()]
-        if id_col:
-            id_col = id_col[0]
-            id_list = df_test[id_col].dropna().unique().tolist()
-            selected_id = st.selectbox("🔍 Sélectionnez un ID Client", id_list)
-
-            client_data = df_test[df_test[id_col] == selected_id]
-            if not client_data.empty:
+        clients = donnees.charger_clients()
+        if clients is not None:
+            selected_id = st.selectbox("🔍 Sélectionnez un ID Client", clients.ids)
+
+            client_data = clients.client(selected_id)
+            if client_data is not None:
                 st.success(f"✅ Données du client {selected_id}")
 
                 infos = client_data.iloc[0].to_dict()
@@ -145,27 +151,12 @@ with tab1:
                 infos_personnelles = ["Gender", "Married", "Dependents", "Education", "Self_Employed", "Credit_History"]
                 infos_professionnelles = ["ApplicantIncome", "CoapplicantIncome", "LoanAmount", "Loan_Amount_Term", "Property_Area"]
 
-                def format_value(key, value):
-                    if key in ["Gender", "Married", "Education", "Self_Employed", "Credit_History"]:
-                        mapping = {
-                            "Gender": {0: "Femme", 1: "Homme"},
-                            "Married": {0: "Non Marié(e)", 1: "Marié(e)"},
-                            "Education": {0: "Supérieur", 1: "Non Supérieur"},
-                            "Self_Employed": {0: "Non", 1: "Oui"},
-                            "Credit_History": {0: "Mauvais", 1: "Bon"},
-                        }
-                        return mapping.get(key, {}).get(value, value)
-                    if key == "Property_Area":
-                        mapping_area = {0: "Rurale", 1: "Urbaine", 2: "Semi-urbaine"}
-                        return mapping_area.get(value, value)
-                    return value
-
                 col1, col2 = st.columns(2)
                 with col1:
                     content = '<div class="big-card">'
                     content += '<div class="big-card-title">Informations personnelles</div>'
                     for key in infos_personnelles:
-                        val = format_value(key, infos.get(key, "N/A"))
+                        val = donnees.libelle(key, infos.get(key, "N/A"))
                         key_clean = key.replace("_", " ").capitalize()
                         content += f'<div class="info-row"><span class="info-label">{key_clean} :</span><span class="info-value">{val}</span></div>'
                     content += '</div>'
@@ -175,7 +166,7 @@ with tab1:
                     content = '<div class="big-card">'
                     content += '<div class="big-card-title">Informations professionnelles</div>'
                     for key in infos_professionnelles:
-                        val = format_value(key, infos.get(key, "N/A"))
+                        val = donnees.libelle(key, infos.get(key, "N/A"))
                         key_clean = key.replace("_", " ").capitalize()
                         content += f'<div class="info-row"><span class="info-label">{key_clean} :</span><span class="info-value">{val}</span></div>'
                     content += '</div>'
@@ -214,11 +205,25 @@ with tab1:
                 elif choix_diagramme == "Comparaison avec la population":
                     st.markdown("### 📊 Revenu du client vs Population")
                 
-                    fig = px.histogram(df_test, x="ApplicantIncome", nbins=50, title="Répartition des revenus dans la population",
-                                       color_discrete_sequence=["lightblue"])
+                    # Histogramme pré-agrégé : seul le marqueur du client change d'un rerun à l'autre
+                    stats_revenu = clients.statistiques["ApplicantIncome"]
+                    revenu_client = client_data["ApplicantIncome"].values[0]
+                    fig = go.Figure(go.Bar(
+                        x=stats_revenu["centres"],
+                        y=stats_revenu["comptes"],
+                        width=stats_revenu["largeurs"],
+                        marker_color="lightblue",
+                        name="ApplicantIncome"
+                    ))
+                    fig.update_layout(
+                        title="Répartition des revenus dans la population",
+                        xaxis_title="ApplicantIncome",
+                        yaxis_title="count",
+                        bargap=0
+                    )
                     
                     fig.add_vline(
-                        x=client_data["ApplicantIncome"].values[0],
+                        x=revenu_client,
                         line_dash="dash",
                         line_color="red",
                         annotation_text="Client sélectionné",
@@ -231,58 +236,40 @@ with tab1:
                         font=dict(color='white')
                     )
                     st.plotly_chart(fig, use_container_width=True)
+                    st.caption(
+                        f"Revenu médian de la population : {stats_revenu['centiles'][50]:,.0f} – "
+                        f"moyenne : {stats_revenu['moyenne']:,.0f} ({stats_revenu['n']} clients). "
+                        f"Le client se situe au {donnees.rang_centile(stats_revenu, revenu_client)}e centile."
+                    )
 
 
                 # === Prédiction ===
                 if st.button("🔍 Prédire ce client"):
                     with st.spinner("Analyse en cours..."):
 
-                        def text_to_int(key, val):
-                            mappings = {
-                                "Gender": {"Femme": 0, "Homme": 1, "Female": 0, "Male": 1},
-                                "Married": {"Non Marié(e)": 0, "Marié(e)": 1, "No": 0, "Yes": 1},
-                                "Education": {"Supérieur": 0, "Non Supérieur": 1, "Graduate": 0, "Not Graduate": 1},
-                                "Self_Employed": {"Non": 0, "Oui": 1, "No": 0, "Yes": 1},
-                                "Credit_History": {"Mauvais": 0, "Bon": 1, 0.0: 0, 1.0: 1, 0: 0, 1: 1},
-                                "Property_Area": {
-                                    "Rurale": 0, "Urbaine": 1, "Semi-urbaine": 2,
-                                    "Rural": 0, "Urban": 1, "Semiurban": 2,
-                                    "RURAL": 0, "URBAN": 1, "SEMIURBAN": 2
-                                }
-                            }
-                            return mappings.get(key, {}).get(val, val)
-
-                        prediction_data = {
-                            "Gender": infos.get("Gender"),
-                            "Married": infos.get("Married"),
-                            "Dependents": infos.get("Dependents"),
-                            "Education": infos.get("Education"),
-                            "Self_Employed": infos.get("Self_Employed"),
-                            "ApplicantIncome": infos.get("ApplicantIncome"),
-                            "CoapplicantIncome": infos.get("CoapplicantIncome"),
-                            "LoanAmount": infos.get("LoanAmount"),
-                            "Loan_Amount_Term": infos.get("Loan_Amount_Term"),
-                            "Credit_History": infos.get("Credit_History"),
-                            "Property_Area": infos.get("Property_Area")
-                        }
-
-                        prediction_data_mapped = {k: text_to_int(k, v) for k, v in prediction_data.items()}
-
-                        valeurs_invalides = any(
-                            pd.isna(val) or 
-                            (isinstance(val, float) and (math.isinf(val) or math.isnan(val)))
-                            for val in prediction_data_mapped.values()
-                        )
+                        prediction_data_mapped = clients.features(selected_id)
+                        valeurs_invalides = prediction_data_mapped is None
 
                         if valeurs_invalides:
                             st.error("❌ Données invalides.")
                             st.session_state.prediction_ok = False
                         else:
                             try:
-                                response = requests.post("https://api-scoring-c8xa.onrender.com/predict", json=prediction_data_mapped)
-                                if response.status_code == 200:
-                                    result = response.json()
-                                    proba = float(result['Probabilité de défaut']) * 100
+                                # Score précalculé par l'API pour tout le fichier (un lot au premier clic)
+                                scores = donnees.scores_clients()
+                                proba = scores.probabilite(selected_id) if scores is not None else None
+                                version = scores.version if scores is not None else None
+                                if proba is None:
+                                    response = client_api.predire(prediction_data_mapped)
+                                    if response.status_code == 200:
+                                        result = response.json()
+                                        proba = float(result['Probabilité de défaut'])
+                                        version = result.get('Version modèle')
+                                    else:
+                                        st.error(f"Erreur prédiction : {response.status_code}")
+
+                                if proba is not None:
+                                    proba = proba * 100
                                     st.session_state.valeur_proba = proba
                                     st.session_state.prediction_ok = True
 
@@ -290,8 +277,8 @@ with tab1:
                                         st.success(f"✅ Crédit Approuvé (risque {proba:.2f}%) – Seuil : {SEUIL}%")
                                     else:
                                         st.error(f"❌ Crédit Refusé (risque {proba:.2f}%) – Seuil : {SEUIL}%")
-                                else:
-                                    st.error(f"Erreur prédiction : {response.status_code}")
+                                    if version:
+                                        st.caption(f"Modèle {version}")
                             except Exception as e:
                                 st.error(f"Erreur API : {e}")
                                 st.session_state.prediction_ok = False
@@ -300,7 +287,7 @@ with tab1:
                 if st.session_state.prediction_ok:
                     diagramme_choisi = st.selectbox(
                         "📊 Choisir un diagramme de visualisation",
-                        ("Jauge Probabilité", "Diagramme Camembert")
+                        ("Jauge Probabilité", "Diagramme Camembert", "Facteurs de la décision")
                     )
                     valeur_proba = st.session_state.valeur_proba
 
@@ -330,6 +317,25 @@ with tab1:
                     
                         st.plotly_chart(fig, use_container_width=True)
                     
+                    elif diagramme_choisi == "Facteurs de la décision":
+                        st.markdown("### 🧭 Facteurs de la décision")
+                        # Demandée seulement à l'affichage, puis gardée pour ce client
+                        explication = st.session_state.get('explication_client')
+                        if explication is None or explication[0] != selected_id:
+                            try:
+                                response = client_api.expliquer(clients.features(selected_id))
+                                if response.status_code == 200:
+                                    explication = (selected_id, response.json())
+                                    st.session_state['explication_client'] = explication
+                                else:
+                                    st.error(f"Erreur explication : {response.status_code}")
+                                    explication = None
+                            except Exception as e:
+                                st.error(f"Erreur API : {e}")
+                                explication = None
+                        if explication is not None:
+                            afficher_facteurs(explication[1])
+
                     elif diagramme_choisi == "Jauge Probabilité":
                         st.markdown("### 🎯 Probabilité de Défaut")
                     
@@ -432,7 +438,8 @@ with tab2:
             }
 
             try:
-                response = requests.post("https://api-scoring-c8xa.onrender.com/predict", json=data)
+                # /explain renvoie la prédiction et les contributions en un seul appel
+                response = client_api.expliquer(data)
 
                 if response.status_code == 200:
                     result = response.json()
@@ -444,12 +451,15 @@ with tab2:
                     else:
                         statut_affiche = "Refusé"
                         st.error(f"❌ Crédit Refusé (risque {proba:.2f}%) – Seuil fixé à {SEUIL}%")
+                    if "Version modèle" in result:
+                        st.caption(f"Modèle {result['Version modèle']}")
 
                     if proba <= SEUIL and credit_history == 0 and coapplicant_income == 0 and applicant_income < 6000 and loan_amount > 100:
                         st.warning("⚠️ Ce profil semble à risque, bien que la probabilité soit faible. Vérifiez les données ou revoyez le modèle.")
 
                     st.session_state['proba_defaut'] = proba
                     st.session_state['applicant_income'] = applicant_income
+                    st.session_state['explication'] = result
 
                 else:
                     st.error("❌ Erreur lors de la prédiction.")
@@ -490,6 +500,10 @@ with tab2:
         
             st.plotly_chart(fig, use_container_width=True)
 
+            if 'Contributions' in st.session_state.get('explication', {}):
+                st.markdown("### 🧭 Facteurs de la décision")
+                afficher_facteurs(st.session_state['explication'])
+
         # ✅ Message final visuel
         couleur_fond = "#27ae60" if proba <= SEUIL else "#e74c3c"
         message = (
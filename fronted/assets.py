@@ -0,0 +1,79 @@
+import base64
+import io
+import os
+
+import streamlit as st
+from PIL import Image
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+# Dossier servi par Streamlit sous app/static/ (server.enableStaticServing)
+STATIC = os.path.join(DOSSIER, "static")
+
+LARGEUR_MAX = int(os.getenv("ASSETS_LARGEUR_MAX", "1920"))
+QUALITE_JPEG = int(os.getenv("ASSETS_QUALITE_JPEG", "80"))
+
+
+def _chemin(image_path):
+    return image_path if os.path.isabs(image_path) else os.path.join(os.path.dirname(DOSSIER), image_path)
+
+
+def _optimiser(source, largeur_max, qualite):
+    """Redimensionne et recompresse ; renvoie (octets, type MIME, extension)."""
+    with Image.open(source) as image:
+        if image.width > largeur_max:
+            hauteur = round(image.height * largeur_max / image.width)
+            image = image.resize((largeur_max, hauteur), Image.LANCZOS)
+        tampon = io.BytesIO()
+        if image.mode in ("RGBA", "LA", "P"):
+            image.save(tampon, format="PNG", optimize=True)
+            return tampon.getvalue(), "image/png", "png"
+        image.convert("RGB").save(tampon, format="JPEG", quality=qualite, optimize=True, progressive=True)
+        return tampon.getvalue(), "image/jpeg", "jpg"
+
+
+@st.cache_resource
+def _preparer(source, mtime, largeur_max, qualite):
+    octets, mime, extension = _optimiser(source, largeur_max, qualite)
+    nom = f"{os.path.splitext(os.path.basename(source))[0].replace(' ', '_')}_{largeur_max}.{extension}"
+    try:
+        os.makedirs(STATIC, exist_ok=True)
+        with open(os.path.join(STATIC, nom), "wb") as f:
+            f.write(octets)
+        fichier = nom
+    except OSError:
+        fichier = None
+    return {"octets": octets, "mime": mime, "fichier": fichier}
+
+
+def preparer_image(image_path, largeur_max=LARGEUR_MAX, qualite=QUALITE_JPEG):
+    """Image optimisée une seule fois par process (et à chaque modification du fichier source)."""
+    source = _chemin(image_path)
+    return _preparer(source, os.path.getmtime(source), largeur_max, qualite)
+
+
+def url_image(image_path, largeur_max=LARGEUR_MAX):
+    """URL statique si le service statique est actif, sinon data URI de l'image optimisée."""
+    asset = preparer_image(image_path, largeur_max)
+    if asset["fichier"] is not None and st.get_option("server.enableStaticServing"):
+        return f"app/static/{asset['fichier']}"
+    return f"data:{asset['mime']};base64,{base64.b64encode(asset['octets']).decode()}"
+
+
+@st.cache_resource
+def _css_fond(url):
+    return f"""
+        <style>
+        .stApp {{
+            background-image: url("{url}");
+            background-size: cover;
+            background-position: center;
+            background-repeat: no-repeat;
+            backdrop-filter: blur(4px);
+        }}
+        </style>
+        """
+
+
+def css_fond(image_path):
+    """Bloc CSS du fond d'écran, mémoïsé : quelques octets si l'image est servie en statique."""
+    return _css_fond(url_image(image_path))
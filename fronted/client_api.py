@@ -0,0 +1,75 @@
+import os
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Configuration de l'API (variables d'environnement, valeurs par défaut = déploiement Render)
+API_URL = os.getenv("API_SCORING_URL", "https://api-scoring-c8xa.onrender.com").rstrip("/")
+TIMEOUT_CONNEXION = float(os.getenv("API_TIMEOUT_CONNEXION", "3"))
+TIMEOUT_LECTURE = float(os.getenv("API_TIMEOUT_LECTURE", "10"))
+TENTATIVES = int(os.getenv("API_TENTATIVES", "3"))
+BACKOFF = float(os.getenv("API_BACKOFF", "0.3"))
+# Sonde de la version servie (/ready) : un seul essai, délai court, résultat
+# réutilisé VERSION_TTL secondes
+VERSION_TTL = float(os.getenv("API_VERSION_TTL", "10"))
+TIMEOUT_SONDE = float(os.getenv("API_TIMEOUT_SONDE", "1"))
+
+
+@st.cache_resource
+def get_session():
+    """Session HTTP partagée entre les reruns : connexions keep-alive réutilisées."""
+    session = requests.Session()
+    retry = Retry(
+        total=TENTATIVES,
+        connect=TENTATIVES,
+        read=TENTATIVES,
+        backoff_factor=BACKOFF,
+        status_forcelist=(502, 503, 504),
+        # Le scoring est idempotent : on peut rejouer les POST
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=10)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@st.cache_data(ttl=VERSION_TTL, show_spinner=False)
+def version_servie():
+    """Version du modèle servi par l'API (/ready), None si elle ne répond pas à temps.
+
+    Hors de la session partagée : ni nouvelle tentative ni attente sur un 503.
+    """
+    try:
+        response = requests.get(f"{API_URL}/ready", timeout=TIMEOUT_SONDE)
+    except requests.RequestException:
+        return None
+    return response.json().get("version") if response.status_code == 200 else None
+
+
+def predire(data):
+    """POST /predict pour un client ; renvoie la réponse HTTP."""
+    return get_session().post(f"{API_URL}/predict", json=data,
+                              timeout=(TIMEOUT_CONNEXION, TIMEOUT_LECTURE))
+
+
+def expliquer(data, top=3):
+    """POST /explain : prédiction + contributions de chaque variable au score."""
+    return get_session().post(f"{API_URL}/explain", json=data, params={"top": top},
+                              timeout=(TIMEOUT_CONNEXION, TIMEOUT_LECTURE))
+
+
+def predire_lot(clients):
+    """POST /predict/batch ; renvoie la réponse HTTP (liste de résultats dans l'ordre)."""
+    return get_session().post(f"{API_URL}/predict/batch", json=list(clients),
+                              timeout=(TIMEOUT_CONNEXION, TIMEOUT_LECTURE))
+
+
+def predire_brut(clients, imputer=True):
+    """POST /predict/raw : données brutes encodées et validées côté API."""
+    return get_session().post(f"{API_URL}/predict/raw", json=list(clients),
+                              params={"imputer": str(imputer).lower()},
+                              timeout=(TIMEOUT_CONNEXION, TIMEOUT_LECTURE))
@@ -0,0 +1,199 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+
+import client_api
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(RACINE, "Api"))
+
+from encodage import FEATURES, encoder, libelle, lignes_valides  # noqa: E402, F401
+
+TEST_PATH = os.path.join(RACINE, "data", "test.csv")
+SCORES_PATH = os.path.join(RACINE, "data", "test_scores.csv")
+
+# Variables numériques pour lesquelles les statistiques de population sont précalculées
+COLONNES_NUMERIQUES = ["ApplicantIncome", "CoapplicantIncome", "LoanAmount", "Loan_Amount_Term"]
+N_BINS = 50
+
+# Scores précalculés pour tout le fichier clients par /predict/batch, avec le
+# modèle servi par l'API (SCORES_PRECALCULES=0 pour revenir à un appel par clic)
+SCORES_PRECALCULES = os.getenv("SCORES_PRECALCULES", "1") == "1"
+TAILLE_LOT_API = int(os.getenv("SCORES_TAILLE_LOT", "1000"))
+
+
+class JeuClients:
+    """Fichier clients chargé une fois, encodé et indexé par identifiant."""
+
+    def __init__(self, df, id_col):
+        self.id_col = id_col
+        self.df = df.reset_index(drop=True)
+        self.ids = self.df[id_col].dropna().unique().tolist()
+        # Identifiant -> position : la sélection d'un client est un accès direct
+        self.positions = {loan_id: i for i, loan_id in enumerate(self.df[id_col])}
+        # Matrice (n, 11) déjà encodée, dans l'ordre attendu par l'API
+        self.X = encoder(self.df)
+        self.valides = lignes_valides(self.X)
+        # Histogrammes et centiles : taille fixe, quel que soit le nombre de clients
+        self.statistiques = {
+            col: statistiques_colonne(pd.to_numeric(self.df[col], errors="coerce").to_numpy(dtype=float))
+            for col in COLONNES_NUMERIQUES if col in self.df.columns
+        }
+
+    def position(self, loan_id):
+        return self.positions.get(loan_id)
+
+    def client(self, loan_id):
+        """DataFrame d'une ligne (données brutes) ou None."""
+        i = self.position(loan_id)
+        return None if i is None else self.df.iloc[[i]]
+
+    def features(self, loan_id):
+        """Payload encodé pour /predict, ou None si les données sont incomplètes."""
+        i = self.position(loan_id)
+        if i is None or not self.valides[i]:
+            return None
+        return dict(zip(FEATURES, self.X[i].tolist()))
+
+
+def statistiques_colonne(valeurs, n_bins=N_BINS):
+    """Histogramme pré-agrégé, centiles 0..100 et statistiques descriptives."""
+    valeurs = valeurs[np.isfinite(valeurs)]
+    if len(valeurs) == 0:
+        return None
+    comptes, bords = np.histogram(valeurs, bins=n_bins)
+    return {
+        "bords": bords,
+        "centres": (bords[:-1] + bords[1:]) / 2,
+        "largeurs": np.diff(bords),
+        "comptes": comptes,
+        "centiles": np.percentile(valeurs, np.arange(101)),
+        "n": len(valeurs),
+        "moyenne": float(valeurs.mean()),
+        "ecart_type": float(valeurs.std()),
+        "min": float(valeurs.min()),
+        "max": float(valeurs.max()),
+    }
+
+
+def rang_centile(stats, valeur):
+    """Centile (0-100) approximatif de `valeur` dans la population."""
+    return int(np.clip(np.searchsorted(stats["centiles"], valeur, side="right") - 1, 0, 100))
+
+
+def _mtime(chemin):
+    return os.path.getmtime(chemin) if os.path.exists(chemin) else 0.0
+
+
+class ScoresClients:
+    """Probabilités du fichier clients calculées par l'API, et la version du modèle."""
+
+    def __init__(self, jeu, probabilites, version):
+        self.jeu = jeu
+        # NaN si données invalides
+        self.probabilites = probabilites
+        self.version = version
+
+    def probabilite(self, loan_id):
+        """Probabilité précalculée, arrondie comme la réponse de /predict, ou None."""
+        i = self.jeu.position(loan_id)
+        if i is None or np.isnan(self.probabilites[i]):
+            return None
+        return round(float(self.probabilites[i]), 2)
+
+
+def precalculer_scores(jeu, version, chemin_scores=SCORES_PATH, chemin_donnees=TEST_PATH):
+    """ScoresClients de tout le fichier, calculés par l'API (/predict/batch).
+
+    Le fichier de scores est réutilisé s'il est plus récent que les données et
+    a été calculé par `version`, le modèle servi ; sinon les clients valides
+    sont envoyés par lots à l'API puis le fichier est réécrit. Lève
+    RuntimeError si l'API échoue ou change de modèle pendant le calcul.
+    """
+    probabilites = np.full(len(jeu.df), np.nan)
+    if _mtime(chemin_scores) >= _mtime(chemin_donnees):
+        scores = pd.read_csv(chemin_scores)
+        if "Version" in scores.columns and (scores["Version"].astype(str) == version).all():
+            positions = scores[jeu.id_col].map(jeu.positions)
+            connues = positions.notna().to_numpy()
+            probabilites[positions[connues].astype(int).to_numpy()] = scores["Probabilite"].to_numpy()[connues]
+            probabilites.setflags(write=False)
+            return ScoresClients(jeu, probabilites, version)
+
+    positions = np.flatnonzero(jeu.valides)
+    clients = [dict(zip(FEATURES, ligne)) for ligne in jeu.X[positions].tolist()]
+    statuts = np.full(len(jeu.df), "", dtype=object)
+    versions = set()
+    try:
+        for debut in range(0, len(clients), TAILLE_LOT_API):
+            response = client_api.predire_lot(clients[debut:debut + TAILLE_LOT_API])
+            response.raise_for_status()
+            resultats = response.json()
+            lot = positions[debut:debut + len(resultats)]
+            probabilites[lot] = [r["Probabilité de défaut"] for r in resultats]
+            statuts[lot] = ["Y" if r["Statut Crédit"] == "Accepté" else "N" for r in resultats]
+            versions.update(r["Version modèle"] for r in resultats)
+    except (requests.RequestException, ValueError, KeyError) as e:
+        raise RuntimeError(f"Précalcul des scores impossible : {e}") from e
+    if len(versions) != 1:
+        raise RuntimeError("Modèle changé pendant le précalcul des scores")
+    version = versions.pop()
+
+    scores = pd.DataFrame({jeu.id_col: jeu.df[jeu.id_col], "Loan_Status": statuts,
+                           "Probabilite": probabilites, "Version": version})
+    try:
+        scores.to_csv(chemin_scores, index=False)
+    except OSError:
+        # Répertoire en lecture seule : les scores restent en mémoire
+        pass
+    probabilites.setflags(write=False)
+    return ScoresClients(jeu, probabilites, version)
+
+
+@st.cache_resource(max_entries=1)
+def _charger_clients(chemin, mtime):
+    df = pd.read_csv(chemin)
+    id_col = next((col for col in df.columns if "id" in col.lower()), None)
+    if id_col is None:
+        return None
+    jeu = JeuClients(df, id_col)
+    jeu.X.setflags(write=False)
+    return jeu
+
+
+def charger_clients(chemin=TEST_PATH):
+    """Charge le fichier clients une seule fois pour toutes les sessions.
+
+    Rechargé quand le fichier change ; aucun appel réseau. cache_resource
+    (et non cache_data) : l'objet est partagé sans copie, il ne doit donc
+    pas être modifié.
+    """
+    return _charger_clients(chemin, _mtime(chemin))
+
+
+@st.cache_resource(max_entries=1)
+def _scores_clients(chemin, mtime, version):
+    # Une exception n'est pas mise en cache : nouvel essai au clic suivant
+    return precalculer_scores(_charger_clients(chemin, mtime), version, chemin_donnees=chemin)
+
+
+def scores_clients(chemin=TEST_PATH):
+    """Scores précalculés par le modèle servi, ou None (API injoignable, précalcul
+    désactivé ou en échec : un appel /predict par clic).
+
+    Appelée seulement au moment de prédire ; la version servie est lue par une
+    sonde courte, sans nouvelle tentative.
+    """
+    if not SCORES_PRECALCULES:
+        return None
+    version = client_api.version_servie()
+    if version is None or _charger_clients(chemin, _mtime(chemin)) is None:
+        return None
+    try:
+        return _scores_clients(chemin, _mtime(chemin), version)
+    except RuntimeError:
+        return None
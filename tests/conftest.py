@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Les modules de l'API s'importent à plat depuis Api/ (uvicorn api_scoring:app --app-dir Api)
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RACINE, "Api"))
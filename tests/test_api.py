@@ -0,0 +1,132 @@
+"""API : valeurs non finies, imputation, taille des lots et routes d'administration."""
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("AUDIT", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import api_scoring  # noqa: E402
+
+CLIENT = dict(Gender=1, Married=1, Dependents=0, Education=0, Self_Employed=0, ApplicantIncome=5720,
+              CoapplicantIncome=0, LoanAmount=110, Loan_Amount_Term=360, Credit_History=1, Property_Area=1)
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(api_scoring.app) as c:
+        yield c
+
+
+@pytest.mark.parametrize("valeur", ["Infinity", "-Infinity", "NaN"])
+@pytest.mark.parametrize("endpoint,lot", [("/predict", False), ("/explain", False), ("/predict/batch", True)])
+def test_valeurs_non_finies_refusees(client, endpoint, lot, valeur):
+    corps = json.dumps({**CLIENT, "ApplicantIncome": 0}).replace('"ApplicantIncome": 0', f'"ApplicantIncome": {valeur}')
+    if lot:
+        corps = f"[{corps}]"
+    reponse = client.post(endpoint, content=corps, headers={"Content-Type": "application/json"})
+    assert reponse.status_code == 422
+    assert reponse.json()["detail"][0]["loc"][-1] == "ApplicantIncome"
+
+
+def test_predict_ok(client):
+    reponse = client.post("/predict", json=CLIENT)
+    assert reponse.status_code == 200
+    assert reponse.json()["Statut Crédit"] in ("Accepté", "Refusé")
+
+
+def test_predict_raw_impute_comme_le_tableau_de_bord(client):
+    from encodage import encoder, lignes_valides
+
+    brut = {**CLIENT, "Credit_History": None}
+    reponse = client.post("/predict/raw", json=[brut])
+    assert reponse.status_code == 200
+    assert reponse.json()["resultats"][0] is not None
+    # Même politique par défaut que score_csv.py et le front-end
+    assert lignes_valides(encoder([brut])).all()
+
+
+def test_predict_raw_lot_trop_volumineux(client, monkeypatch):
+    monkeypatch.setattr(api_scoring, "MAX_BATCH_SIZE", 1)
+    assert client.post("/predict/raw", json=[CLIENT, CLIENT]).status_code == 413
+
+
+def test_admin_desactive_sans_jeton(client, monkeypatch):
+    monkeypatch.setattr(api_scoring, "ADMIN_TOKEN", "")
+    assert client.post("/admin/drift/reset").status_code == 403
+    assert client.get("/admin/modele", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+@pytest.mark.parametrize("version", ["%2E%2E", "inconnue"])
+def test_admin_version_hors_registre(client, monkeypatch, version):
+    monkeypatch.setattr(api_scoring, "ADMIN_TOKEN", "secret")
+    assert client.post(f"/admin/modele/{version}").status_code == 403
+    entetes = {"X-Admin-Token": "secret"}
+    assert client.post(f"/admin/modele/{version}", headers=entetes).status_code == 404
+    assert client.post(f"/admin/shadow/{version}", headers=entetes).status_code == 404
+
+
+@pytest.mark.parametrize("endpoint", ["/predict/batch", "/explain/batch", "/predict/raw"])
+def test_corps_trop_volumineux_refuse_avant_validation(client, monkeypatch, endpoint):
+    monkeypatch.setattr(api_scoring, "MAX_BATCH_OCTETS", 1000)
+    # Corps non valide : un 413 prouve qu'il n'a pas été validé
+    reponse = client.post(endpoint, content=b"[" + b"x" * 2000 + b"]", headers={"Content-Type": "application/json"})
+    assert reponse.status_code == 413
+    assert client.post(endpoint, json=[CLIENT]).status_code == 200
+
+
+def test_cache_hit_compte_la_probabilite(client):
+    import metriques
+    from cache_predictions import CachePredictions
+
+    brut = {**CLIENT, "ApplicantIncome": 4321}
+    client.post("/predict", json=brut)
+    avant = metriques.probabilites._series[()][2]
+    client.post("/predict", json=brut)
+    assert metriques.probabilites._series[()][2] == avant + 1
+
+    desactive = CachePredictions(taille_max=0)
+    assert desactive.get((1.0,)) is None
+    assert desactive.stats()["misses"] == 0
+
+
+def test_audit_bloquer_ne_gele_pas_la_boucle(monkeypatch, tmp_path):
+    import asyncio
+
+    import numpy as np
+
+    from audit import JournalAudit
+
+    # Journal non démarré : tampon plein après une ligne, l'appel suivant attend 200 ms
+    plein = JournalAudit(str(tmp_path), capacite=1, politique="bloquer", attente_ms=200)
+    monkeypatch.setattr(api_scoring, "journal", plein)
+    ligne = np.ones((1, 11))
+
+    async def scenario():
+        battements = 0
+
+        async def metronome():
+            nonlocal battements
+            while True:
+                battements += 1
+                await asyncio.sleep(0.005)
+
+        tache = asyncio.create_task(metronome())
+        await api_scoring.auditer_async("/predict", "v1", ligne, [1], [0.5])
+        await api_scoring.auditer_async("/predict", "v1", ligne, [1], [0.5])
+        tache.cancel()
+        return battements
+
+    assert asyncio.run(scenario()) >= 10
+    assert plein.pertes == 1
+
+
+def test_explain_sans_facteur_nul(client):
+    # Variables au minimum du scaler : contribution exactement nulle
+    nul = {**CLIENT, "Gender": 0, "Married": 0, "Dependents": 0, "Education": 0, "Self_Employed": 0}
+    reponse = client.post("/explain", params={"top": 11}, json=nul).json()
+    assert reponse["Contributions"]["Dependents"] == 0
+    assert all(f["contribution"] != 0 for f in reponse["Principaux facteurs"])
+    assert len(reponse["Principaux facteurs"]) < 11
@@ -0,0 +1,58 @@
+"""Journal d'audit : JSON valide pour les valeurs non finies et lecture multi-workers."""
+import calendar
+import gzip
+import json
+import os
+import time
+
+import numpy as np
+
+import audit
+
+
+def _ts(heure):
+    return calendar.timegm(time.strptime(f"20261018T{heure}", "%Y%m%dT%H%M%S"))
+
+
+def _segment(dossier, heure, pid, lignes):
+    chemin = os.path.join(dossier, f"audit-20261018T{heure}-{pid}-0000.jsonl.gz")
+    with gzip.open(chemin, "wt", encoding="utf-8") as f:
+        for ligne in lignes:
+            f.write(ligne + "\n")
+    return chemin
+
+
+def test_valeurs_non_finies_ecrites_null(tmp_path):
+    journal = audit.JournalAudit(str(tmp_path), fsync_s=-1)
+    journal.demarrer()
+    X = np.ones((2, 11))
+    X[0, 5] = np.nan
+    journal.enregistrer("/predict", "v1", X, [1, 0], [np.nan, 0.25])
+    journal.enregistrer("/predict", "v1", np.ones((1, 11)), [1], [0.75])
+    journal.arreter()
+
+    enregistrements = list(audit.lire(str(tmp_path)))
+    assert len(enregistrements) == 3
+    assert enregistrements[0]["entrees"]["ApplicantIncome"] is None
+    assert enregistrements[0]["probabilite"] is None
+    assert enregistrements[1]["probabilite"] == 0.25
+    assert enregistrements[2]["entrees"]["ApplicantIncome"] == 1.0
+
+
+def test_lignes_illisibles_ignorees(tmp_path):
+    valide = json.dumps({"ts": _ts("080000"), "version": "v1", "decision": "Accepté"})
+    _segment(str(tmp_path), "080000", 1, [valide, '{"ts": 1, "probabilite": nan}', valide[:10]])
+    assert len(list(audit.lire(str(tmp_path)))) == 1
+
+
+def test_segment_ouvert_d_un_autre_worker(tmp_path):
+    # Worker A : segment ouvert à 08:00, écrit jusqu'à 08:50 ; worker B : segment ouvert à 08:01
+    a = _segment(str(tmp_path), "080000", 1, [json.dumps({"ts": _ts(h), "decision": "Accepté", "version": "v1"})
+                                                for h in ("083000", "085000")])
+    os.utime(a, (_ts("085000"), _ts("085000")))
+    b = _segment(str(tmp_path), "080100", 2, [json.dumps({"ts": _ts("084000"), "decision": "Refusé", "version": "v1"})])
+    os.utime(b, (_ts("084000"), _ts("084000")))
+
+    assert sorted(e["ts"] for e in audit.lire(str(tmp_path), depuis=_ts("082500"))) == \
+        [_ts("083000"), _ts("084000"), _ts("085000")]
+    assert len(list(audit.lire(str(tmp_path), depuis=_ts("090000")))) == 0
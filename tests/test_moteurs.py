@@ -0,0 +1,91 @@
+"""Parité du moteur compilé avec la chaîne pickle scaler + modèle sur data/test.csv."""
+import copy
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from artefacts import charger_artefacts, charger_compact
+from encodage import encoder, lignes_valides
+from moteurs import MoteurCompile, MoteurSklearn
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def chaine():
+    with warnings.catch_warnings():
+        # Pickles produits avec une autre version de scikit-learn
+        warnings.simplefilter("ignore")
+        model, scaler = charger_artefacts()
+    return model, scaler
+
+
+@pytest.fixture(scope="module")
+def X_test():
+    X = encoder(pd.read_csv(os.path.join(RACINE, "data", "test.csv")), imputer=True)
+    X = X[lignes_valides(X)]
+    assert len(X) > 300
+    return X
+
+
+@pytest.fixture(scope="module", params=["pickles", "compact"])
+def moteur(request, chaine):
+    if request.param == "compact":
+        return MoteurCompile.depuis_compact(charger_compact())
+    return MoteurCompile(*chaine)
+
+
+def test_scorer_parite(moteur, chaine, X_test):
+    pred_ref, proba_ref = MoteurSklearn(*chaine).scorer(X_test)
+    predictions, probabilities = moteur.scorer(X_test)
+    np.testing.assert_array_equal(predictions, pred_ref)
+    np.testing.assert_allclose(probabilities, proba_ref, rtol=0, atol=1e-12)
+
+
+def test_expliquer_parite(moteur, chaine, X_test):
+    reference = MoteurSklearn(*chaine)
+    pred_ref, proba_ref, contrib_ref = reference.expliquer(X_test)
+    predictions, probabilities, contributions = moteur.expliquer(X_test)
+    np.testing.assert_array_equal(predictions, pred_ref)
+    np.testing.assert_allclose(probabilities, proba_ref, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(contributions, contrib_ref, rtol=0, atol=1e-12)
+    assert moteur.base == pytest.approx(reference.base)
+
+    # Base + somme des contributions = log-odds de la probabilité renvoyée
+    z = contributions.sum(axis=1) + moteur.base
+    np.testing.assert_allclose(1.0 / (1.0 + np.exp(-z)), proba_ref, rtol=0, atol=1e-12)
+
+
+def test_compact_perime(chaine, tmp_path):
+    import joblib
+
+    from artefacts import COMPACT_PATH, MODEL_PATH, SCALER_PATH, ecrire_sommes, exporter_compact
+
+    model, scaler = chaine
+    pickles = (str(tmp_path / os.path.basename(MODEL_PATH)), str(tmp_path / os.path.basename(SCALER_PATH)))
+    compact_path, sommes_path = str(tmp_path / os.path.basename(COMPACT_PATH)), str(tmp_path / "artefacts.sha256")
+    joblib.dump(model, pickles[0])
+    joblib.dump(scaler, pickles[1])
+    exporter_compact(model, scaler, compact_path, pickles)
+    ecrire_sommes([*pickles, compact_path], sommes_path)
+    charger_compact(compact_path, sommes_path, pickles)
+
+    # Scaler remplacé (et sommes mises à jour) sans réexport du format compact
+    joblib.dump(copy.deepcopy(scaler).partial_fit(scaler.data_max_[None] * 2), pickles[1])
+    ecrire_sommes([*pickles, compact_path], sommes_path)
+    with pytest.raises(ValueError, match="n'est plus issu"):
+        charger_compact(compact_path, sommes_path, pickles)
+
+
+def test_version_independante_du_format():
+    import registre
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        versions = {registre.charger_modele(moteur_nom=moteur, format_artefacts=format_artefacts).version
+                    for moteur, format_artefacts in (("compile", "compact"), ("compile", "pickle"),
+                                                     ("sklearn", "compact"))}
+    assert len(versions) == 1
@@ -0,0 +1,42 @@
+"""Scoring fantôme : agrégats repris au redémarrage et additionnés entre process."""
+import json
+import os
+
+import numpy as np
+
+from shadow import Agregat, Shadow
+
+
+class _Challenger:
+    version = "v2"
+
+
+def _agregat(delta):
+    agregat = Agregat()
+    agregat.ajouter(np.array([1, 0]), np.array([0.5, 0.2]), np.array([1, 1]), np.array([0.5, 0.2]) + delta)
+    return agregat
+
+
+def test_agregats_repris_et_cumules(tmp_path):
+    base = str(tmp_path / "shadow_stats.json")
+    premier = Shadow(_Challenger(), stats_path=base)
+    premier.agregats[("v1", "v2")] = _agregat(0.1)
+    premier.sauvegarder()
+
+    # Autre worker : son fichier est additionné, pas écrasé
+    with open(str(tmp_path / "shadow_stats-999999.json"), "w") as f:
+        json.dump({"agregats": [{"champion": "v1", "challenger": "v2", **_agregat(-0.3).etat()}]}, f)
+
+    # Redémarrage avec le même pid : les agrégats précédents sont repris
+    second = Shadow(_Challenger(), stats_path=base)
+    assert second.agregats[("v1", "v2")].lignes == 2
+    second.agregats[("v1", "v2")].fusionner(_agregat(0.1))
+    second.sauvegarder()
+
+    assert sorted(os.listdir(str(tmp_path))) == [f"shadow_stats-{os.getpid()}.json", "shadow_stats-999999.json"]
+    paire = second.stats()["paires"][0]
+    assert paire["lignes"] == 6
+    assert paire["desaccords"] == 3
+    assert paire["delta_abs_max"] == 0.3
+    assert sum(paire["histogramme_delta"]["comptes"]) == 6
+    assert second.stats(cumuler=False)["paires"][0]["lignes"] == 4